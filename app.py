@@ -5,8 +5,8 @@ from http import HTTPStatus
 
 from aiohttp import web
 from aiohttp.web import Request, Response, json_response
-from botbuilder.core import BotFrameworkAdapter, BotFrameworkAdapterSettings, ConversationState
-from botbuilder.core import   TurnContext, UserState, MemoryStorage
+from botbuilder.core import BotFrameworkAdapterSettings, ConversationState
+from botbuilder.core import   TurnContext, UserState
 
 from botbuilder.core.integration import aiohttp_error_middleware
 from botbuilder.schema import Activity, ActivityTypes
@@ -14,11 +14,18 @@ from botbuilder.schema import Activity, ActivityTypes
 from config import DefaultConfig
 from dialogs import UserProfileDialog
 from bots import YnovBot
+from helpers.admission import AdmissionController, RateLimiter, Rejected
+from helpers.metrics import REGISTRY
+from helpers.outbound import BufferedBotFrameworkAdapter
+from helpers.sqlite_storage import SqliteStorage
+from helpers.timing_middleware import TimingMiddleware
 
 CONFIG = DefaultConfig()
 
 SETTINGS = BotFrameworkAdapterSettings(CONFIG.APP_ID, CONFIG.APP_PASSWORD)
-ADAPTER = BotFrameworkAdapter(SETTINGS)
+# Les réponses d'un tour sont regroupées par l'OutboundBuffer du bot avant d'être envoyées
+ADAPTER = BufferedBotFrameworkAdapter(SETTINGS)
+ADAPTER.use(TimingMiddleware())
 
 
 # Catch-all for errors.
@@ -45,13 +52,35 @@ async def on_error(context: TurnContext, error: Exception):
 
 ADAPTER.on_turn_error = on_error
 
-MEMORY = MemoryStorage()
-CONVERSATION_STATE = ConversationState(MEMORY)
-USER_STATE = UserState(MEMORY)
+STORAGE = SqliteStorage(CONFIG.STATE_DB, cache_size=CONFIG.STATE_CACHE_SIZE)
+CONVERSATION_STATE = ConversationState(STORAGE)
+USER_STATE = UserState(STORAGE)
 
 # create main dialog and bot
 DIALOG = UserProfileDialog(USER_STATE)
-BOT = YnovBot(CONVERSATION_STATE, USER_STATE, DIALOG)
+BOT = YnovBot(CONVERSATION_STATE, USER_STATE, DIALOG, storage=STORAGE)
+
+# Limite des activités traitées simultanément et des messages par utilisateur
+ADMISSION = AdmissionController(CONFIG.ADMISSION_MAX_IN_FLIGHT, CONFIG.ADMISSION_MAX_QUEUE,
+                                CONFIG.ADMISSION_QUEUE_TIMEOUT)
+RATE_LIMITER = RateLimiter(CONFIG.RATE_LIMIT_PER_MINUTE / 60, CONFIG.RATE_LIMIT_BURST) \
+    if CONFIG.RATE_LIMIT_PER_MINUTE > 0 else None
+
+BUSY_REPLY = "Je suis très sollicité en ce moment, merci de réessayer dans quelques instants."
+
+
+# Réponse courte envoyée sans charger l'état de la conversation quand le bot est saturé.
+async def busy(turn_context: TurnContext):
+    await turn_context.send_activity(BUSY_REPLY)
+
+
+# Méthode pour refuser une activité : message "réessayez" à l'utilisateur, ou 429 avec Retry-After
+async def reject(activity: Activity, auth_header: str, rejected: Rejected) -> Response:
+    if CONFIG.ADMISSION_BUSY_REPLY and rejected.reason != "rate_limited" and activity.type == ActivityTypes.message:
+        await ADAPTER.process_activity(activity, auth_header, busy)
+        return Response(status=HTTPStatus.OK)
+    return Response(status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers={"Retry-After": str(max(1, round(rejected.retry_after)))})
 
 
 # Listen for incoming requests on /api/messages.
@@ -63,13 +92,68 @@ async def messages(req: Request) -> Response:
     activity = Activity().deserialize(body)
     auth_header = req.headers["Authorization"] if "Authorization" in req.headers else ""
 
-    response = await ADAPTER.process_activity(activity, auth_header, BOT.on_turn)
+    deferred = []
+
+    async def turn(turn_context: TurnContext):
+        await BOT.on_turn(turn_context)
+        deferred.append(YnovBot.is_deferred(turn_context))
+
+    try:
+        if RATE_LIMITER is not None and activity.type == ActivityTypes.message:
+            user = activity.from_property.id if activity.from_property else activity.conversation.id
+            RATE_LIMITER.check(f"{activity.channel_id}:{user}")
+        async with ADMISSION.admit():
+            response = await ADAPTER.process_activity(activity, auth_header, turn)
+    except Rejected as rejected:
+        return await reject(activity, auth_header, rejected)
     if response:return json_response(data=response.body, status=response.status)
+    # La réponse du tour arrivera par une tâche de fond (réponse différée)
+    if any(deferred):return Response(status=HTTPStatus.ACCEPTED)
     return Response(status=HTTPStatus.OK)
 
 
+# Métriques du processus au format texte Prometheus (durée des tours et des appels externes).
+async def metrics(req: Request) -> Response:
+    return Response(body=REGISTRY.render().encode("utf-8"),
+                    headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+# Lancement des tâches de fond au démarrage du serveur.
+async def on_startup(app: web.Application):
+    BOT.http.start()
+    BOT.weather.start()
+    BOT.prewarm.start()
+
+
+# Arrêt des tâches de fond et fermeture des clients partagés à l'arrêt du serveur.
+async def on_cleanup(app: web.Application):
+    # Les réponses différées encore en cours sont annulées après un court délai
+    await BOT.background.close(grace=CONFIG.BACKGROUND_SHUTDOWN_GRACE)
+    await BOT.weather.stop()
+    await BOT.prewarm.stop()
+    await BOT.bot.translator.close()
+    await BOT.bot.llm.close()
+    BOT.bot.audio.close()
+    BOT.bot.extractor.close()
+    await BOT.http.close()
+    await BOT.bot.ner.close()
+    # Les profils en attente sont écrits avant de fermer la base
+    try:
+        await BOT.profiles.flush()
+    except Exception as error:
+        print(f"Profils non écrits à l'arrêt : {error}", file=sys.stderr)
+    BOT.profiles.close()
+    BOT.database.close()
+    STORAGE.close()
+
+
 APP = web.Application(middlewares=[aiohttp_error_middleware])
 APP.router.add_post("/api/messages", messages)
+APP.router.add_get("/metrics", metrics)
+APP.router.add_get(BOT.bot.audio.ROUTE, BOT.bot.audio.handle)
+APP.router.add_get(BOT.profiles.blobs.ROUTE, BOT.profiles.blobs.handle)
+APP.on_startup.append(on_startup)
+APP.on_cleanup.append(on_cleanup)
 
 
 if __name__ == "__main__":
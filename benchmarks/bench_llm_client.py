@@ -0,0 +1,44 @@
+"""
+Mesure du client LLM asynchrone contre le serveur OpenAI simulé.
+
+    python -m benchmarks.bench_llm_client --requests 200 --latency 0.5 --concurrency 64
+
+Avec un client non bloquant, la durée totale est proche de
+ceil(requests / concurrency) * latency et non de requests * latency.
+"""
+
+import argparse
+import asyncio
+import math
+import time
+
+from benchmarks.fake_servers import make_openai_app, start_server
+from helpers.llm_client import LLMClient
+
+
+async def main(args):
+    runner, url = await start_server(make_openai_app(args.latency))
+    client = LLMClient(base_url=f"{url}/v1", timeout=args.timeout, max_concurrency=args.concurrency)
+
+    start = time.perf_counter()
+    replies = await asyncio.gather(*[
+        client.chat([{"role": "user", "content": f"Phrase {i}"}], max_tokens=50)
+        for i in range(args.requests)])
+    elapsed = time.perf_counter() - start
+
+    await client.close()
+    await runner.cleanup()
+
+    ideal = math.ceil(args.requests / args.concurrency) * args.latency
+    print(f"{len(replies)} completions in {elapsed:.2f}s "
+          f"({len(replies) / elapsed:.1f} req/s, ideal {ideal:.2f}s, "
+          f"serial would be {args.requests * args.latency:.2f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(main(parser.parse_args()))
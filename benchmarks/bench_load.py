@@ -0,0 +1,180 @@
+"""
+Test de charge hors ligne de /api/messages : le bot (benchmarks.offline_app) est lancé dans un processus séparé,
+face à des serveurs locaux simulant le Bot Connector, l'API OpenAI, la recherche Bing et la météo MSN,
+chacun avec sa latence. Des conversations scriptées (création du profil, Actualité, Traduction) sont jouées
+avec une concurrence donnée ; le débit et les percentiles p50/p95/p99 de la durée des tours sont mesurés.
+
+    python -m benchmarks.bench_load --conversations 200 --concurrency 20 --output load.jsonl
+
+Une conversation : arrivée, création du profil (une sur --profile-every) ou refus, une actualité
+et une traduction. Les thématiques et phrases tournent sur --topics et --phrases valeurs (effet des caches).
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks import bot_process, conversations
+from benchmarks.bench_startup import free_port, ROOT
+from benchmarks.fake_servers import (make_bing_app, make_connector_app, make_msn_app, make_openai_app,
+                                     start_server)
+
+
+def percentile(values: list, q: float) -> float:
+    """ Percentile q (0-100) par rang le plus proche ; 0.0 pour une liste vide. """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def script(conversation: int, connector_url: str, args) -> list:
+    turns = conversations.welcome(conversation, connector_url)
+    if args.profile_every and conversation % args.profile_every == 0:
+        turns += conversations.profile(conversation, connector_url)
+    else:
+        turns += conversations.skip_profile(conversation, connector_url)
+    turns += conversations.news(conversation, connector_url,
+                                conversations.TOPICS[conversation % min(args.topics, len(conversations.TOPICS))])
+    phrase = conversations.PHRASES[conversation % len(conversations.PHRASES)]
+    turns += conversations.translation(conversation, connector_url, f"{phrase} ({conversation % args.phrases})")
+    return turns
+
+
+async def run_conversation(session: aiohttp.ClientSession, bot_url: str, turns: list, latencies: dict,
+                           errors: list):
+    for kind, turn in turns:
+        start = time.perf_counter()
+        try:
+            async with session.post(f"{bot_url}/api/messages", json=turn) as resp:
+                await resp.read()
+                status = resp.status
+        except aiohttp.ClientError as error:
+            errors.append(f"{kind}: {error}")
+            return
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        if status >= 300:
+            errors.append(f"{kind}: HTTP {status}")
+            return
+
+
+async def drive(bot_url: str, connector_url: str, args):
+    """ Joue les conversations avec au plus args.concurrency conversations simultanées. """
+    latencies, errors = {}, []
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def one(conversation: int):
+        async with slots:
+            await run_conversation(session, bot_url, script(conversation, connector_url, args), latencies, errors)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=120)) as session:
+        await bot_process.wait_ready(session, bot_url, args.timeout)
+        start = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(args.conversations)])
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def git_revision() -> str:
+    out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return out.stdout.strip()
+
+
+async def main(args) -> dict:
+    connector = make_connector_app(args.connector_latency)
+    fakes = {"connector": connector,
+             "openai": make_openai_app(args.openai_latency, args.token_latency),
+             "bing": make_bing_app(args.bing_latency),
+             "msn": make_msn_app(args.msn_latency)}
+    servers = {name: await start_server(app) for name, app in fakes.items()}
+    urls = {name: url for name, (_, url) in servers.items()}
+
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="load-")
+    env = {"OPENAI_API_BASE": urls["openai"] + "/v1", "OPENAI_KEY": "offline",
+           "BING_URL": urls["bing"] + "/news/search",
+           "MSN_URL": urls["msn"] + "/fr-fr/meteo/previsions/in-{city}",
+           "PUBLIC_URL": f"http://127.0.0.1:{port}",
+           "OFFLINE_TTS_LATENCY": str(args.tts_latency)}
+    proc = bot_process.launch(workdir, port, env, workers=args.workers, module="benchmarks.offline_app",
+                              verbose=args.verbose)
+    try:
+        latencies, errors, elapsed = await drive(f"http://127.0.0.1:{port}", urls["connector"], args)
+    finally:
+        bot_process.stop(proc)
+        for runner, _ in servers.values():
+            await runner.cleanup()
+
+    errors += [f"bot error in {conversation}" for conversation, activities in connector["activities"].items()
+               if any("The bot encountered an error" in (activity.get("text") or "") for activity in activities)]
+    all_turns = [value for values in latencies.values() for value in values]
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")},
+        "elapsed": round(elapsed, 3),
+        "conversations_per_s": round(args.conversations / elapsed, 2),
+        "turns_per_s": round(len(all_turns) / elapsed, 2),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "upstream_calls": {name: app["calls"] for name, app in fakes.items() if "calls" in app},
+        "connector_activities": sum(len(activities) for activities in connector["activities"].values()),
+        "turns": {kind: {"count": len(values),
+                         "p50": round(percentile(values, 50), 4),
+                         "p95": round(percentile(values, 95), 4),
+                         "p99": round(percentile(values, 99), 4),
+                         "max": round(max(values), 4)}
+                  for kind, values in sorted(dict(latencies, all=all_turns).items())},
+    }
+
+
+def report(result: dict):
+    print(f"{result['config']['conversations']} conversations, concurrency {result['config']['concurrency']}, "
+          f"{result['config']['workers']} worker(s) : {result['elapsed']:.2f}s, "
+          f"{result['turns_per_s']:.1f} turns/s, {result['conversations_per_s']:.2f} conversations/s, "
+          f"{result['errors']} error(s)")
+    print(f"{'turn':<12}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for kind, stats in result["turns"].items():
+        print(f"{kind:<12}{stats['count']:>7}{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}"
+              f"{stats['max']:>9.3f}")
+    print(f"upstream calls : {result['upstream_calls']}, connector activities : {result['connector_activities']}")
+    for sample in result["error_samples"]:
+        print(f"  error : {sample}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="Plus de 1 : gunicorn (gunicorn.conf.py)")
+    parser.add_argument("--profile-every", type=int, default=4,
+                        help="Une conversation sur N crée un profil (0 : aucune)")
+    parser.add_argument("--topics", type=int, default=5, help="Nombre de thématiques d'actualité distinctes")
+    parser.add_argument("--phrases", type=int, default=1000, help="Nombre de phrases à traduire distinctes")
+    parser.add_argument("--connector-latency", type=float, default=0.05)
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--bing-latency", type=float, default=0.2)
+    parser.add_argument("--msn-latency", type=float, default=0.2)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Fichier JSON lines auquel ajouter le résultat")
+    parser.add_argument("--verbose", action="store_true", help="Affiche la sortie d'erreur du bot")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    report(result)
+    if args.output:
+        with open(args.output, "a") as file:
+            file.write(json.dumps(result) + "\n")
+    sys.exit(1 if result["errors"] else 0)
@@ -0,0 +1,74 @@
+"""
+Comparaison sur CPU de l'ancienne reconnaissance d'entités (pipeline("ner") recréé à chaque appel)
+et du moteur partagé par lots (helpers.ner_engine.NEREngine).
+
+    python -m benchmarks.bench_ner --model dslim/bert-base-NER --requests 64 --max-batch 16 --max-wait-ms 10
+
+--per-call limite le nombre d'appels mesurés pour l'ancienne méthode, qui recharge le modèle à chaque fois.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from helpers.ner_engine import NEREngine
+from helpers.lazy import LazyModule
+
+transformers = LazyModule("transformers")
+
+PHRASES = [
+    "Emmanuel Macron a rencontré Olaf Scholz à Berlin.",
+    "La Banque centrale européenne relève ses taux à Francfort.",
+    "Le PSG affronte l'Olympique de Marseille au Parc des Princes.",
+    "Apple présente son nouvel iPhone à Cupertino.",
+    "Thomas Pesquet décolle de Cap Canaveral avec SpaceX.",
+    "Airbus livre ses premiers A321XLR à Toulouse.",
+    "Kylian Mbappé rejoint le Real Madrid.",
+    "Christine Lagarde s'exprime devant le Parlement européen à Strasbourg.",
+]
+
+
+def per_call(model: str, requests: int) -> list:
+    """ Ancienne méthode : un pipeline construit à chaque appel. Retourne les durées par appel. """
+    durations = []
+    for i in range(requests):
+        start = time.perf_counter()
+        pipe = transformers.pipeline("ner", model=model) if model else transformers.pipeline("ner")
+        pipe(PHRASES[i % len(PHRASES)])
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def batched(engine: NEREngine, requests: int) -> float:
+    """ Moteur partagé : toutes les requêtes sont soumises simultanément. Retourne la durée totale. """
+    start = time.perf_counter()
+    await asyncio.gather(*[engine.recognize(PHRASES[i % len(PHRASES)]) for i in range(requests)])
+    return time.perf_counter() - start
+
+
+async def main(args):
+    durations = per_call(args.model, args.per_call)
+    print(f"per-call loading : {statistics.mean(durations):.3f}s/request, "
+          f"{1 / statistics.mean(durations):.2f} req/s ({args.per_call} requests)")
+
+    engine = NEREngine(model=args.model, max_batch_size=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    start = time.perf_counter()
+    engine.load()
+    print(f"shared engine    : model loaded once in {time.perf_counter() - start:.3f}s")
+
+    elapsed = await batched(engine, args.requests)
+    stats = engine.stats()
+    print(f"shared engine    : {args.requests / elapsed:.2f} req/s ({args.requests} requests in {elapsed:.3f}s, "
+          f"{stats['batches']} batches, mean size {stats['mean_batch_size']:.1f})")
+    await engine.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Modèle NER (défaut : celui de pipeline('ner'))")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--per-call", type=int, default=3)
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
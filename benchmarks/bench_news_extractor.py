@@ -0,0 +1,69 @@
+"""
+Comparaison de l'ancienne extraction des actualités (arbre complet de la page avec html.parser puis
+find_all('a', 'title')) et de helpers.news_extractor.NewsExtractor (SoupStrainer, parseur au choix, nombre
+d'articles plafonné) sur les pages Bing enregistrées dans benchmarks/fixtures.
+
+    python -m benchmarks.bench_news_extractor --repeat 50
+
+Pour chaque méthode : durée médiane d'une analyse et pic d'allocations mesuré par tracemalloc.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import time
+import tracemalloc
+
+import bs4
+
+from benchmarks.fake_servers import FIXTURES
+from helpers.news_extractor import NewsExtractor, default_parser
+
+
+def full_tree(html: str) -> list:
+    """ Ancienne méthode de ActuBot._actualities. """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    return [(article.text, article.attrs['href']) for article in soup.find_all('a', 'title')]
+
+
+def measure(extract, html: str, repeat: int) -> dict:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(html)
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    articles = extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"median_ms": statistics.median(durations) * 1000, "peak_kb": peak / 1024, "articles": len(articles)}
+
+
+def main(args):
+    parsers = ["html.parser"] + (["lxml"] if default_parser() == "lxml" else [])
+    methods = [("full tree (html.parser)", full_tree)]
+    methods += [(f"extractor ({parser})", NewsExtractor(args.max_articles, parser=parser).extract)
+                for parser in parsers]
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES, args.pattern))):
+        with open(path, encoding="utf-8") as file:
+            html = file.read()
+        print(f"{os.path.basename(path)} ({len(html) / 1024:.0f} KB)")
+        baseline = None
+        for name, extract in methods:
+            result = measure(extract, html, args.repeat)
+            baseline = baseline or result
+            print(f"  {name:<26}{result['median_ms']:>8.2f} ms{result['peak_kb']:>9.0f} KB peak"
+                  f"{result['articles']:>4} articles   x{baseline['median_ms'] / result['median_ms']:.1f} faster")
+    if "lxml" not in parsers:
+        print("lxml is not installed: only html.parser was measured")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--max-articles", type=int, default=20)
+    parser.add_argument("--pattern", default="bing_*.html", help="Fichiers de benchmarks/fixtures à analyser")
+    main(parser.parse_args())
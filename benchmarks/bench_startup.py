@@ -0,0 +1,122 @@
+"""
+Mesure du démarrage à froid du bot : temps d'import de app.py et temps jusqu'au premier 200
+sur /api/messages, en lançant `python app.py` dans un dossier de travail vierge.
+
+    python -m benchmarks.bench_startup --runs 3 --output startup.jsonl --max-ready 15
+
+Le code de retour est 1 si une médiane dépasse le seuil donné (--max-import, --max-ready).
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Activité sans membre ajouté : le bot la traite sans rien envoyer au connecteur
+PROBE = {
+    "type": "conversationUpdate",
+    "id": "startup-probe",
+    "channelId": "emulator",
+    "serviceUrl": "http://127.0.0.1:9/",
+    "conversation": {"id": "startup-probe"},
+    "from": {"id": "probe-user"},
+    "recipient": {"id": "bot"},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(workdir: str) -> float:
+    code = f"import sys, time; sys.path.insert(0, {ROOT!r}); t = time.perf_counter(); import app; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(workdir: str, top: int = 10) -> list:
+    """ Imports directs de app.py les plus coûteux (python -X importtime, temps cumulé). """
+    code = f"import sys; sys.path.insert(0, {ROOT!r}); import app"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=workdir, capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", line)
+        if match and len(match.group(2)) == 2:  # un niveau sous app
+            rows.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def measure_ready(workdir: str, timeout: float) -> float:
+    port = free_port()
+    env = dict(os.environ, PORT=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "app.py")], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/api/messages", data=json.dumps(PROBE).encode(),
+                                         headers={"Content-Type": "application/json"})
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(request, timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+        raise TimeoutError(f"/api/messages did not answer 200 within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main(args) -> int:
+    imports, readies = [], []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            imports.append(measure_import(workdir))
+        with tempfile.TemporaryDirectory() as workdir:
+            readies.append(measure_ready(workdir, args.timeout))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        slowest = slowest_imports(workdir)
+
+    result = {"timestamp": time.time(), "python": sys.version.split()[0],
+              "import_s": statistics.median(imports), "ready_s": statistics.median(readies),
+              "import_runs": imports, "ready_runs": readies,
+              "slowest_imports": [{"module": name, "s": seconds} for seconds, name in slowest]}
+
+    print(f"import app       : {result['import_s']:.3f}s (median of {args.runs})")
+    print(f"first 200        : {result['ready_s']:.3f}s (median of {args.runs})")
+    for seconds, name in slowest:
+        print(f"  {seconds:7.3f}s  {name}")
+
+    if args.output:
+        with open(args.output, "a") as file:
+            file.write(json.dumps(result) + "\n")
+
+    failed = ((args.max_import and result["import_s"] > args.max_import)
+              or (args.max_ready and result["ready_s"] > args.max_ready))
+    if failed:
+        print("Cold-start regression : threshold exceeded", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Fichier JSON lines où ajouter le résultat")
+    parser.add_argument("--max-import", type=float, help="Seuil en secondes pour l'import de app.py")
+    parser.add_argument("--max-ready", type=float, help="Seuil en secondes pour le premier 200")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,89 @@
+"""
+Comparaison des moteurs de traduction de helpers.translation sur un corpus de phrases :
+le LLM (serveur OpenAI simulé, avec sa latence), un appel par phrase ou par lot de phrases, et le modèle
+seq2seq local sur CPU (MarianMT).
+
+    python -m benchmarks.bench_translation --model Helsinki-NLP/opus-mt-fr-en --requests 64
+    HF_HUB_OFFLINE=1 python -m benchmarks.bench_translation --model hf-internal-testing/tiny-random-MarianMTModel
+
+Pour chaque moteur : latence d'une phrase seule (p50, p95) puis débit avec --requests phrases soumises
+simultanément (lots du modèle local). Le petit modèle de test, une fois en cache, permet de lancer le benchmark
+sans réseau ; ses traductions n'ont pas de sens, seules les durées comptent.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_load import percentile
+from benchmarks.conversations import PHRASES
+from benchmarks.fake_servers import make_openai_app, start_server
+from helpers.llm_client import LLMClient
+from helpers.translation import BatchedLLMTranslationBackend, LLMTranslationBackend, LocalTranslationBackend
+
+CORPUS = PHRASES + [
+    "Bonsoir.", "À demain !", "Pouvez-vous répéter, s'il vous plaît ?", "Combien coûte ce livre ?",
+    "Le musée est fermé le lundi.", "Nous partons en vacances à la montagne la semaine prochaine.",
+    "Elle a obtenu son diplôme d'ingénieure l'année dernière.",
+    "Les résultats de l'étude seront publiés au printemps, après une relecture par des chercheurs indépendants.",
+]
+
+
+async def measure(backend, requests: int, sequential: int) -> dict:
+    durations = []
+    for i in range(sequential):
+        start = time.perf_counter()
+        await backend.translate(CORPUS[i % len(CORPUS)])
+        durations.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[backend.translate(CORPUS[i % len(CORPUS)]) for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    return {"p50": percentile(durations, 50), "p95": percentile(durations, 95), "elapsed": elapsed,
+            "throughput": requests / elapsed}
+
+
+def report(name: str, result: dict, requests: int):
+    print(f"{name:<8} single phrase p50 {result['p50'] * 1000:8.1f} ms, p95 {result['p95'] * 1000:8.1f} ms | "
+          f"{requests} concurrent in {result['elapsed']:.2f}s ({result['throughput']:.1f} phrases/s)")
+
+
+async def main(args):
+    openai = make_openai_app(args.latency)
+    runner, url = await start_server(openai)
+    llm = LLMClient(base_url=f"{url}/v1", timeout=30, max_concurrency=args.requests)
+    backends = [("llm", LLMTranslationBackend(llm)),
+                ("batched", BatchedLLMTranslationBackend(llm, max_batch_size=args.max_batch,
+                                                         max_wait=args.max_wait_ms / 1000))]
+    for name, backend in backends:
+        calls = openai["calls"]
+        report(name, await measure(backend, args.requests, args.sequential), args.requests)
+        print(f"{name:<8} {openai['calls'] - calls} LLM calls")
+        await backend.close()
+    await llm.close()
+    await runner.cleanup()
+
+    if args.skip_local:
+        return
+    local = LocalTranslationBackend(model=args.model, max_batch_size=args.max_batch,
+                                    max_wait=args.max_wait_ms / 1000)
+    start = time.perf_counter()
+    await local.ready()
+    print(f"local    model '{args.model}' loaded in {time.perf_counter() - start:.2f}s")
+    report("local", await measure(local, args.requests, args.sequential), args.requests)
+    stats = local.stats()
+    print(f"local    {stats['batches']} batches, mean size {stats['mean_batch_size']:.1f}")
+    print(f"example  {CORPUS[0]!r} -> {await local.translate(CORPUS[0])!r}")
+    await local.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="Helsinki-NLP/opus-mt-fr-en")
+    parser.add_argument("--skip-local", action="store_true", help="Ne mesure que le LLM")
+    parser.add_argument("--requests", type=int, default=64, help="Phrases soumises simultanément")
+    parser.add_argument("--sequential", type=int, default=16, help="Phrases traduites une à une")
+    parser.add_argument("--latency", type=float, default=0.5, help="Latence du LLM simulé, en secondes")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
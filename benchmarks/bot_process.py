@@ -0,0 +1,56 @@
+"""
+Lancement du bot dans un processus séparé pour les benchmarks : un processus aiohttp, ou gunicorn
+(gunicorn.conf.py) avec plusieurs workers.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.bench_startup import ROOT
+
+# Activité sans membre ajouté : le bot la traite sans rien envoyer au connecteur
+PROBE = {"type": "conversationUpdate", "id": "probe", "channelId": "emulator", "serviceUrl": "http://127.0.0.1:9/",
+         "conversation": {"id": "probe"}, "from": {"id": "probe"}, "recipient": {"id": "bot"}}
+
+
+def launch(workdir: str, port: int, env: dict = None, workers: int = 1, module: str = "app",
+           access_log: str = None, verbose: bool = False) -> subprocess.Popen:
+    """
+    Démarre le bot dans workdir (bases SQLite, audio et images y sont créés).
+    workers : int     --> 1 : `python -m module` ; plus : gunicorn module:APP avec WEB_CONCURRENCY=workers
+    module : str      --> Module exposant APP (app, benchmarks.offline_app)
+    access_log : str  --> Journal d'accès gunicorn, une ligne par requête avec le pid du worker
+    """
+    env = dict(os.environ, **(env or {}), PORT=str(port), WEB_CONCURRENCY=str(workers),
+               PYTHONPATH=os.pathsep.join([ROOT, os.environ.get("PYTHONPATH", "")]))
+    if workers > 1 or access_log:
+        command = [sys.executable, "-m", "gunicorn", f"{module}:APP", "-c", os.path.join(ROOT, "gunicorn.conf.py")]
+        if access_log:
+            command += ["--access-logfile", access_log, "--access-logformat", "%P"]
+    else:
+        command = [sys.executable, "-m", module]
+    return subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+                            stderr=sys.stderr if verbose else subprocess.DEVNULL)
+
+
+async def wait_ready(session: aiohttp.ClientSession, bot_url: str, timeout: float = 60):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            async with session.post(f"{bot_url}/api/messages", json=PROBE) as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError(f"the bot did not answer within {timeout}s")
+
+
+def stop(proc: subprocess.Popen):
+    proc.terminate()
+    proc.wait()
@@ -0,0 +1,97 @@
+"""
+Vérification du mode multi-processus : le bot est lancé avec gunicorn (gunicorn.conf.py) et N conversations
+simultanées remplissent leur profil puis l'affichent. Les tours successifs d'une même conversation sont
+répartis entre les workers ; chaque conversation doit retrouver son propre état et son propre profil.
+
+    python -m benchmarks.check_multiworker --workers 4 --conversations 32
+
+Le code de retour est 1 si une conversation reçoit une réponse qui ne lui appartient pas,
+une erreur du bot, ou ne retrouve pas son profil.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+from benchmarks import bot_process, conversations
+from benchmarks.fake_servers import make_connector_app, start_server
+from benchmarks.bench_startup import free_port
+
+
+def script(conversation: int, connector_url: str) -> list:
+    """ Création du profil (dialogue en plusieurs tours) puis affichage du profil. """
+    return [turn for _, turn in (conversations.welcome(conversation, connector_url)
+                                 + conversations.profile(conversation, connector_url)
+                                 + conversations.show_profile(conversation, connector_url))]
+
+
+async def run_conversation(session: aiohttp.ClientSession, bot_url: str, conversation: int, connector_url: str):
+    for turn in script(conversation, connector_url):
+        async with session.post(f"{bot_url}/api/messages", json=turn) as resp:
+            if resp.status >= 300:
+                raise RuntimeError(f"conversation {conversation}: HTTP {resp.status}")
+
+
+def check(conversation: int, replies: list, conversations: int) -> list:
+    """ Retourne la liste des anomalies d'une conversation. """
+    errors = []
+    texts = [str(reply.get("text") or "") + str(reply.get("attachments") or "") for reply in replies]
+    if any("The bot encountered an error" in text for text in texts):
+        errors.append("bot error")
+    for other in range(conversations):
+        if other != conversation and any(f"Nom{other}'" in text or f"Nom{other} " in text for text in texts):
+            errors.append(f"reply from conversation {other}")
+    if not any(f"Nom : Nom{conversation}" in text and f"City : Ville{conversation}" in text for text in texts):
+        errors.append("profile card missing")
+    return errors
+
+
+async def main(args) -> int:
+    connector = make_connector_app()
+    runner, connector_url = await start_server(connector)
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="multiworker-")
+    # Le pid du worker est journalisé pour chaque requête
+    access_log = os.path.join(workdir, "access.log")
+    proc = bot_process.launch(workdir, port, workers=args.workers, access_log=access_log, verbose=args.verbose)
+    bot_url = f"http://127.0.0.1:{port}"
+    try:
+        # Une connexion par tour : les tours d'une conversation sont répartis entre les workers
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as session:
+            await bot_process.wait_ready(session, bot_url, args.timeout)
+            start = time.perf_counter()
+            await asyncio.gather(*[run_conversation(session, bot_url, i, connector_url)
+                                   for i in range(args.conversations)])
+            elapsed = time.perf_counter() - start
+    finally:
+        bot_process.stop(proc)
+        await runner.cleanup()
+
+    activities = connector["activities"]
+    failures = 0
+    for i in range(args.conversations):
+        errors = check(i, activities.get(f"conversation-{i}", []), args.conversations)
+        if errors:
+            failures += 1
+            print(f"conversation {i}: {', '.join(errors)}")
+
+    with open(access_log) as log:
+        pids = {line.strip() for line in log if line.strip()}
+    turns = args.conversations * len(script(0, connector_url))
+    print(f"{args.conversations} conversations, {turns} turns in {elapsed:.2f}s on {len(pids)} workers, "
+          f"{failures} conversation(s) with errors")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--conversations", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--verbose", action="store_true", help="Affiche la sortie d'erreur de gunicorn")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,68 @@
+"""
+Conversations scriptées envoyées à /api/messages par les benchmarks : chaque tour est un couple
+(type de tour, activité). Les réponses du bot arrivent sur le serveur de benchmarks.fake_servers.make_connector_app.
+"""
+
+import itertools
+
+_ids = itertools.count()
+
+TOPICS = ["sport", "politique", "économie", "climat", "technologie", "santé", "culture", "international",
+          "science", "éducation"]
+
+PHRASES = ["Bonjour, comment allez-vous ?", "Le train part à huit heures.", "Il fait beau aujourd'hui.",
+           "Je voudrais réserver une table pour deux personnes.", "Où se trouve la gare ?",
+           "Merci beaucoup pour votre aide.", "La réunion est reportée à demain.", "J'aime lire le soir."]
+
+
+def activity(conversation: int, service_url: str, text: str = None, **fields) -> dict:
+    """ Activité reçue par le bot de la part de l'utilisateur user-{conversation}. """
+    body = {
+        "type": "message",
+        "id": f"activity-{next(_ids)}",
+        "channelId": "emulator",
+        "serviceUrl": service_url,
+        "conversation": {"id": f"conversation-{conversation}"},
+        "from": {"id": f"user-{conversation}", "name": f"User {conversation}"},
+        "recipient": {"id": "bot"},
+    }
+    if text is not None:
+        body["text"] = text
+    body.update(fields)
+    return body
+
+
+def welcome(conversation: int, service_url: str) -> list:
+    """ Arrivée de l'utilisateur dans la conversation (carte d'introduction). """
+    return [("welcome", activity(conversation, service_url, type="conversationUpdate",
+                                 membersAdded=[{"id": f"user-{conversation}"}]))]
+
+
+def profile(conversation: int, service_url: str) -> list:
+    """ Création du profil : toutes les étapes de UserProfileDialog, image comprise. """
+    picture = {"contentType": "image/png", "contentUrl": f"https://example.com/picture-{conversation}.png",
+               "name": f"picture-{conversation}.png"}
+    texts = ["Oui", "Voiture", f"Nom{conversation}", "no", f"Ville{conversation}"]
+    turns = [("profile", activity(conversation, service_url, text)) for text in texts]
+    turns.append(("profile", activity(conversation, service_url, "", attachments=[picture])))
+    turns.append(("profile", activity(conversation, service_url, "yes")))
+    return turns
+
+
+def skip_profile(conversation: int, service_url: str) -> list:
+    return [("menu", activity(conversation, service_url, "Non "))]
+
+
+def show_profile(conversation: int, service_url: str) -> list:
+    return [("menu", activity(conversation, service_url, "Profil")),
+            ("profile", activity(conversation, service_url, "Afficher le profil"))]
+
+
+def news(conversation: int, service_url: str, topic: str) -> list:
+    return [("menu", activity(conversation, service_url, "Actualité")),
+            ("news", activity(conversation, service_url, topic))]
+
+
+def translation(conversation: int, service_url: str, phrase: str) -> list:
+    return [("menu", activity(conversation, service_url, "Traduction")),
+            ("translation", activity(conversation, service_url, phrase))]
@@ -0,0 +1,152 @@
+"""
+Serveurs locaux simulant les services externes du bot, pour tester et mesurer hors ligne.
+
+    python -m benchmarks.fake_servers --port 8081 --latency 0.5
+
+puis lancer le bot avec OPENAI_API_BASE=http://localhost:8081/v1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from aiohttp import web
+
+
+#------------------ OpenAI ------------------#
+
+def make_openai_app(latency: float = 0.0, token_latency: float = 0.0) -> web.Application:
+    """
+    Application aiohttp imitant l'endpoint /v1/chat/completions d'OpenAI, avec ou sans stream.
+    Une demande dont le message est un tableau JSON de textes (traductions groupées) reçoit un tableau JSON.
+    latency : float         --> délai avant le premier fragment de réponse, en secondes
+    token_latency : float   --> délai entre deux fragments d'une réponse en stream, en secondes
+    """
+
+    async def stream(req: web.Request, content: str) -> web.StreamResponse:
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(req)
+        for i, word in enumerate(content.split(" ")):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            await asyncio.sleep(req.app["token_latency"])
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def chat_completions(req: web.Request) -> web.Response:
+        body = await req.json()
+        req.app["calls"] += 1
+        await asyncio.sleep(req.app["latency"])
+
+        prompt = body["messages"][-1]["content"]
+        content = f"Réponse simulée ({body.get('model')}). Demande reçue : {prompt[:80]}."
+        if prompt.startswith("["):
+            content = json.dumps([f"Réponse simulée ({body.get('model')}). Demande reçue : {text[:80]}."
+                                  for text in json.loads(prompt)], ensure_ascii=False)
+        if body.get("stream"):
+            return await stream(req, content)
+
+        return web.json_response({
+            "id": f"chatcmpl-{req.app['calls']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+        })
+
+    app = web.Application()
+    app["latency"] = latency
+    app["token_latency"] = token_latency
+    app["calls"] = 0
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+#------------------ Pages web (Bing, MSN) ------------------#
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def make_page_app(route: str, fixture: str, latency: float = 0.0) -> web.Application:
+    """
+    Application aiohttp servant une page HTML enregistrée (benchmarks/fixtures) sur une route GET.
+    route : str      --> Route aiohttp, ex. "/news/search"
+    fixture : str    --> Nom du fichier dans benchmarks/fixtures
+    latency : float  --> délai avant la réponse, en secondes
+    """
+    with open(os.path.join(FIXTURES, fixture), encoding="utf-8") as file:
+        html = file.read()
+
+    async def page(req: web.Request) -> web.Response:
+        req.app["calls"] += 1
+        await asyncio.sleep(req.app["latency"])
+        return web.Response(text=html, content_type="text/html")
+
+    app = web.Application()
+    app["latency"] = latency
+    app["calls"] = 0
+    app.router.add_get(route, page)
+    return app
+
+
+def make_bing_app(latency: float = 0.0) -> web.Application:
+    """ Recherche d'actualités Bing : /news/search?q=... (BING_URL={url}/news/search) """
+    return make_page_app("/news/search", "bing_news.html", latency)
+
+
+def make_msn_app(latency: float = 0.0) -> web.Application:
+    """ Prévisions MSN : /fr-fr/meteo/previsions/in-{city} (MSN_URL={url}/fr-fr/meteo/previsions/in-{city}) """
+    return make_page_app("/fr-fr/meteo/previsions/{page}", "msn_weather.html", latency)
+
+
+#------------------ Bot Connector ------------------#
+
+def make_connector_app(latency: float = 0.0) -> web.Application:
+    """
+    Application aiohttp imitant le Bot Connector : elle reçoit les réponses du bot (serviceUrl des activités)
+    et les range par conversation dans app["activities"][conversation_id].
+    latency : float --> délai de réponse à chaque activité envoyée, en secondes
+    """
+
+    async def send(req: web.Request) -> web.Response:
+        activity = await req.json()
+        await asyncio.sleep(req.app["latency"])
+        conversation_id = req.match_info["conversation_id"]
+        req.app["activities"].setdefault(conversation_id, []).append(activity)
+        return web.json_response({"id": f"{conversation_id}-{len(req.app['activities'][conversation_id])}"})
+
+    app = web.Application()
+    app["latency"] = latency
+    app["activities"] = {}
+    app.router.add_post("/v3/conversations/{conversation_id}/activities", send)
+    app.router.add_post("/v3/conversations/{conversation_id}/activities/{activity_id}", send)
+    return app
+
+
+#------------------ Lancement ------------------#
+
+async def start_server(app: web.Application, port: int = 0, host: str = "127.0.0.1"):
+    """
+    Démarre l'application dans la boucle courante, retourne (runner, url).
+    port : int --> 0 pour un port libre choisi par le système
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    web.run_app(make_openai_app(args.latency, args.token_latency), host="127.0.0.1", port=args.port)
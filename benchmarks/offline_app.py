@@ -0,0 +1,21 @@
+"""
+app.APP sans accès réseau : la synthèse vocale utilise le moteur local (helpers.tts.LocalTTSBackend, audio muet)
+avec une durée de synthèse de OFFLINE_TTS_LATENCY secondes. Les autres services sont redirigés par la configuration
+(OPENAI_API_BASE, BING_URL, MSN_URL) vers les serveurs de benchmarks.fake_servers.
+
+    python -m benchmarks.offline_app                                   (un processus)
+    gunicorn benchmarks.offline_app:APP -c gunicorn.conf.py            (plusieurs workers)
+"""
+
+import os
+
+# Lu par DefaultConfig : à définir avant d'importer app
+os.environ["TTS_BACKEND"] = "local"
+os.environ["TTS_LOCAL_LATENCY"] = os.environ.get("OFFLINE_TTS_LATENCY", "0.2")
+
+from app import APP, CONFIG  # noqa: E402  (après le choix du moteur de synthèse vocale)
+
+if __name__ == "__main__":
+    from aiohttp import web
+
+    web.run_app(APP, host="127.0.0.1", port=CONFIG.PORT)
@@ -1,68 +1,143 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
-import requests, bs4, pickle
-
-from botbuilder.core import ActivityHandler, MessageFactory, TurnContext, CardFactory, ConversationState, UserState
+from botbuilder.core import ActivityHandler, MessageFactory, TurnContext, CardFactory, ConversationState, UserState, Storage, BotAdapter
 from botbuilder.schema import ChannelAccount, HeroCard, CardImage, CardAction, ActionTypes, SuggestedActions, AudioCard, MediaUrl
 from botbuilder.dialogs import Dialog 
 
-from config import DataBase, db, ActuBot
+from config import DataBase, AsyncDataBase, ActuBot, DefaultConfig
+from data_models import ConversationData
+from helpers.background import BackgroundTasks
+from helpers.blob_store import BlobStore
 from helpers.dialog_helper import DialogHelper
+from helpers.http_client import HttpClient
+from helpers.news_prewarm import NewsPrewarmer
+from helpers.outbound import OutboundBuffer
+from helpers.profile_store import ProfileStore
+from helpers.sentences import split_sentences
+from helpers.weather import WeatherService
 
 
 # This bot's main dialog.
+# Le bot est partagé par toutes les conversations : les données d'une conversation sont dans
+# ConversationState (ConversationData) et celles de l'utilisateur dans UserState et la table User (ProfileStore).
 class YnovBot(ActivityHandler):
-    def __init__(self, conversation_state: ConversationState, user_state: UserState, dialog: Dialog):
+    # Clé du turn_state indiquant que la réponse du tour est différée (DEFERRED_REPLIES)
+    DEFERRED = "YnovBot.deferred"
+
+    def __init__(self, conversation_state: ConversationState, user_state: UserState, dialog: Dialog, storage: Storage = None):
         self.conversation_state = conversation_state
         self.user_state = user_state
         self.dialog = dialog
-        self.bot = ActuBot()
-        self.fonctionality = None
-        self.database = DataBase()
-        self.database.create_table('User', 
-                                   id_user=db.String, 
-                                   name=db.String, 
-                                   age=db.Integer, 
-                                   city=db.String, 
-                                   transport=db.String, 
-                                   picture=db.PickleType)
+        self.storage = storage
+        self.conversation_data_accessor = self.conversation_state.create_property("ConversationData")
+        self.database = AsyncDataBase(DataBase())
+        # Client HTTP partagé par le scraping des actualités et de la météo
+        self.http = HttpClient.from_config(DefaultConfig)
+        self.bot = ActuBot(database=self.database, http=self.http)
+        self.weather = WeatherService(self.database,
+                                      refresh_interval=DefaultConfig.WEATHER_REFRESH_INTERVAL,
+                                      recent_ttl=DefaultConfig.WEATHER_RECENT_TTL,
+                                      url=DefaultConfig.MSN_URL,
+                                      http=self.http)
+        self.prewarm = NewsPrewarmer(self.bot,
+                                     top_k=DefaultConfig.NEWS_PREWARM_TOP_K,
+                                     refresh_interval=DefaultConfig.NEWS_PREWARM_INTERVAL,
+                                     max_concurrency=DefaultConfig.NEWS_PREWARM_CONCURRENCY,
+                                     half_life=DefaultConfig.NEWS_PREWARM_HALF_LIFE)
+        self.profiles = ProfileStore(self.database,
+                                     BlobStore(DefaultConfig.PICTURES_DIR, base_url=DefaultConfig.PUBLIC_URL),
+                                     maxsize=DefaultConfig.PROFILE_CACHE_SIZE,
+                                     ttl=DefaultConfig.PROFILE_CACHE_TTL,
+                                     flush_delay=DefaultConfig.PROFILE_FLUSH_DELAY_MS / 1000)
+        self.background = BackgroundTasks(max_concurrency=DefaultConfig.BACKGROUND_MAX_CONCURRENCY,
+                                          max_pending=DefaultConfig.BACKGROUND_MAX_PENDING)
     
     async def on_turn(self, turn_context: TurnContext):
-        await super().on_turn(turn_context)
+        # Les réponses du tour sont retenues par l'adaptateur et envoyées ensemble à la fin du tour (ou à chaque flush)
+        outbound = self.outbound(turn_context)
+        try:
+            await super().on_turn(turn_context)
+        finally:
+            await outbound.close()
         # Save any state changes that might have ocurred during the turn.
         await self.conversation_state.save_changes(turn_context)
         await self.user_state.save_changes(turn_context)
+        # Les deux écritures sont validées ensemble, en une transaction ; seul un conflit sur les clés
+        # de ce tour (conversation, utilisateur) est levé ici
+        if self.storage is not None and hasattr(self.storage, "flush"):
+            await self.storage.flush([self.conversation_state.get_storage_key(turn_context),
+                                      self.user_state.get_storage_key(turn_context)])
+
+    def outbound(self, turn_context: TurnContext) -> OutboundBuffer:
+        return OutboundBuffer(turn_context, merge_text=DefaultConfig.OUTBOUND_MERGE_TEXT,
+                              max_chars=DefaultConfig.OUTBOUND_MAX_CHARS)
+
+    @classmethod
+    def is_deferred(cls, turn_context: TurnContext) -> bool:
+        """ True si la réponse du tour est envoyée plus tard, par une tâche de fond. """
+        return bool(turn_context.turn_state.get(cls.DEFERRED))
+
+    # Méthode pour répondre hors de la requête HTTP du tour (DEFERRED_REPLIES) : reply(turn_context, *args) est
+    # exécutée en tâche de fond dans un nouveau tour ouvert par continue_conversation, avec la référence de la
+    # conversation. Retourne False si la réponse doit être faite dans le tour courant (mode désactivé, file pleine).
+    # reply ne doit pas modifier l'état de la conversation : il est enregistré à la fin du tour courant.
+    def defer(self, turn_context: TurnContext, reply, *args) -> bool:
+        if not DefaultConfig.DEFERRED_REPLIES:
+            return False
+
+        adapter = turn_context.adapter
+        reference = TurnContext.get_conversation_reference(turn_context.activity)
+        # L'identité du tour reçu sert au tour différé (l'App ID est vide en local)
+        claims_identity = turn_context.turn_state.get(BotAdapter.BOT_IDENTITY_KEY)
+        audience = turn_context.turn_state.get(BotAdapter.BOT_OAUTH_SCOPE_KEY)
+
+        async def callback(context: TurnContext):
+            outbound = self.outbound(context)
+            try:
+                await reply(context, *args)
+            finally:
+                await outbound.close()
+
+        deferred = self.background.spawn(lambda: adapter.continue_conversation(
+            reference, callback, bot_id=DefaultConfig.APP_ID or None,
+            claims_identity=claims_identity, audience=audience))
+        if deferred:
+            turn_context.turn_state[self.DEFERRED] = True
+        return deferred
 
     async def on_members_added_activity(self, members_added:[ChannelAccount], turn_context:TurnContext):
-        self.first_dialog = True #utilisé pour vérifier si le multi-turn est terminé
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
+        data.first_dialog = True #utilisé pour vérifier si le multi-turn est terminé
         
         for member in members_added:
             if member.id != turn_context.activity.recipient.id:
-                await self.__send_intro_card(turn_context)
-                await self.connexion(turn_context)
+                user = await self.get_user(turn_context)
+                await self.__send_intro_card(turn_context, user)
+                await self.connexion(turn_context, user)
                 
 
     # Ne pas modifier cette fonction
     async def on_message_activity(self, turn_context: TurnContext):
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
 
         if turn_context.activity.text in ["menu", "help", "info", 'aide', "intro", 'exit', 'quit']:
             await self.intro(turn_context)
-            self.fonctionality = None
+            data.fonctionality = None
 
-        elif self.first_dialog: await self.create_user_profile(turn_context)
+        elif data.first_dialog: await self.create_user_profile(turn_context)
 
         # Fonctionnalité Actualité du menu principal
         elif turn_context.activity.text in ["Actualité", "Traduction", "Profil"]:
-            self.fonctionality = turn_context.activity.text
-            message = ("Quelle actualité souhaitez-vous voir ?" if self.fonctionality == "Actualité" else None 
-                        or "Que souhaitez-vous traduire ?" if self.fonctionality == "Traduction" else "Que souhaitez-vous faire ?")
+            data.fonctionality = turn_context.activity.text
+            message = ("Quelle actualité souhaitez-vous voir ?" if data.fonctionality == "Actualité" else None 
+                        or "Que souhaitez-vous traduire ?" if data.fonctionality == "Traduction" else "Que souhaitez-vous faire ?")
             await turn_context.send_activity(MessageFactory.text(message))
 
         # Appel des fonctionnalités
-        if self.fonctionality == "Actualité" and turn_context.activity.text!= "Actualité": await self.actuality(turn_context)
-        elif self.fonctionality == "Profil": return await self.profil(turn_context)
-        elif self.fonctionality == "Traduction" and turn_context.activity.text!= "Traduction":return await self.traduction(turn_context)
+        if data.fonctionality == "Actualité" and turn_context.activity.text!= "Actualité": await self.actuality(turn_context)
+        elif data.fonctionality == "Profil": return await self.profil(turn_context)
+        elif data.fonctionality == "Traduction" and turn_context.activity.text!= "Traduction":return await self.traduction(turn_context)
 
 
 
@@ -70,11 +145,17 @@ class YnovBot(ActivityHandler):
 
     async def traduction(self, turn_context: TurnContext):
 
-        traduction = self.bot.trad(turn_context.activity.text)
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
+        data.fonctionality = None
+        phrase = turn_context.activity.text
+        if self.defer(turn_context, self.traduction_reply, phrase):
+            return await turn_context.send_activity(MessageFactory.text("Traduction en cours..."))
+        return await self.traduction_reply(turn_context, phrase)
+
+    async def traduction_reply(self, turn_context: TurnContext, phrase: str):
+        traduction, audio = await self.bot.trad(phrase)
         await turn_context.send_activity(MessageFactory.text(traduction))
-        
-        self.fonctionality = None
-        await self.audio_card(turn_context, './trad.mp3')
+        await self.audio_card(turn_context, audio)
 
         return await self.intro(turn_context)
 
@@ -92,26 +173,28 @@ class YnovBot(ActivityHandler):
 
         reply_activity = MessageFactory.text("")
         reply_activity.suggested_actions = SuggestedActions(actions=card_actions)
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
 
         
         # Si Modifier le profil -> Supprimer de la database et relancer le user_profile
         if turn_context.activity.text == "Modifier le profil":
-            self.database.delete_row_by_id('User', turn_context.activity.recipient.id)
-            self.fonctionality = None
-            self.first_dialog = True
+            await self.profiles.delete(turn_context.activity.from_property.id)
+            data.fonctionality = None
+            data.first_dialog = True
             return await self.create_user_profile(turn_context)
 
         # Si Afficher le profil -> Afficher le profile avec une card
         if turn_context.activity.text == "Afficher le profil":
-            self.fonctionality = None
+            data.fonctionality = None
             try:
+                user = await self.get_user(turn_context)
                 card = HeroCard(
                 title="Profil utilisateur",
-                text="Nom : " + self.user.name + "\n \n"
-                "Age : " + str(self.user.age) + "\n \n"
-                "City : " + str(self.user.city) + "\n \n"
-                "Moyen de transport : " + self.user['transport'] + "\n \n",
-                images=[CardImage(url=pickle.loads(self.user['picture']).content_url)])
+                text="Nom : " + user.name + "\n \n"
+                "Age : " + str(user.age) + "\n \n"
+                "City : " + str(user.city) + "\n \n"
+                "Moyen de transport : " + user.transport + "\n \n",
+                images=[CardImage(url=user.picture.content_url)] if user.picture else None)
 
                 await turn_context.send_activity(MessageFactory.attachment(CardFactory.hero_card(card)))
                 return await self.intro(turn_context)
@@ -119,12 +202,12 @@ class YnovBot(ActivityHandler):
                 await turn_context.send_activity(MessageFactory.text("Vous n'avez pas encore de profil !"))
                 return await self.intro(turn_context)
 
-        # Si Supprimer le profil -> Supprimer de la database et supprimer le profil self.user
+        # Si Supprimer le profil -> Supprimer de la database
         if turn_context.activity.text == "Supprimer le profil":
             try:
-                self.database.delete_row_by_id('User', self.user[0])
-                self.fonctionality = None
-                self.user = None
+                user = await self.get_user(turn_context)
+                await self.profiles.delete(user.id_user)
+                data.fonctionality = None
                 await turn_context.send_activity(MessageFactory.text("Votre profil a bien été supprimé !"))
                 return await self.intro(turn_context)
             except:
@@ -154,8 +237,9 @@ class YnovBot(ActivityHandler):
 
 
     async def create_user_profile(self, turn_context: TurnContext):
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
         if turn_context.activity.text == "Non ":
-            self.first_dialog = False
+            data.first_dialog = False
             await turn_context.send_activity(MessageFactory.text(f"C'est noté ! Commençons la discussion !"))
             return await self.intro(turn_context)
             
@@ -163,16 +247,14 @@ class YnovBot(ActivityHandler):
         user_state = UserState(turn_context.adapter).get(turn_context)
 
         if user_state:
-            self.first_dialog = False
-            self.user_profile = user_state['UserProfile']
-            self.database.add_row('User', 
-                                    id_user=str(turn_context.activity.recipient.id), 
-                                    name=str(self.user_profile.name), 
-                                    age=int(self.user_profile.age), 
-                                    city=str(self.user_profile.city),
-                                    transport=str(self.user_profile.transport), 
-                                    picture=pickle.dumps(self.user_profile.picture))
-            self.user = self.database.read_table_by_id('User', 'id_user', turn_context.activity.recipient.id)
+            data.first_dialog = False
+            user_profile = user_state['UserProfile']
+            await self.profiles.save(str(turn_context.activity.from_property.id), 
+                                    name=str(user_profile.name), 
+                                    age=int(user_profile.age), 
+                                    city=str(user_profile.city),
+                                    transport=str(user_profile.transport), 
+                                    picture=user_profile.picture)
             return await self.intro(turn_context)
 
 
@@ -180,42 +262,63 @@ class YnovBot(ActivityHandler):
 
     async def actuality(self, turn_context: TurnContext):
         key_user = turn_context.activity.text
+        self.prewarm.record(key_user)
         await turn_context.send_activity(
             MessageFactory.text(f"Voici les actualités du jour sur la thématique : {key_user}."))
-        
-        response = self.bot.actualities(key_user)
-        await self.audio_card(turn_context, f'./{key_user}.mp3')
-
-        for text in response.split('. '):
-            await turn_context.send_activity(MessageFactory.text(text + "."))
 
-        self.fonctionality = None
+        data = await self.conversation_data_accessor.get(turn_context, ConversationData)
+        data.fonctionality = None
+        if self.defer(turn_context, self.actuality_reply, key_user):
+            return
+        return await self.actuality_reply(turn_context, key_user)
+
+    async def actuality_reply(self, turn_context: TurnContext, key_user: str):
+        outbound = OutboundBuffer.get(turn_context)
+        # La première phrase est envoyée dès qu'elle est prête (en mode stream, dès que le LLM l'a terminée) ;
+        # les suivantes partent ensemble dès la fin de la synthèse, sans attendre l'audio, puis la carte audio et le menu
+        if DefaultConfig.NEWS_STREAMING:
+            sent = 0
+            async for text in self.bot.actualities_stream(key_user):
+                await turn_context.send_activity(MessageFactory.text(text))
+                sent += 1
+                if sent == 1 and outbound is not None:
+                    await outbound.flush()
+            if outbound is not None:
+                await outbound.flush()
+            response, audio = await self.bot.actualities(key_user)
+        else:
+            response, audio = await self.bot.actualities(key_user)
+            for sent, text in enumerate(split_sentences(response), 1):
+                await turn_context.send_activity(MessageFactory.text(text))
+                if sent == 1 and outbound is not None:
+                    await outbound.flush()
+
+        # Pas de carte audio si les actualités sont indisponibles
+        if audio:
+            await self.audio_card(turn_context, audio)
         return await self.intro(turn_context)
     
 
     #------------------ Card Introduction ------------------#
 
     
-    async def __send_intro_card(self, turn_context:TurnContext):
-        self.user = self.database.read_table_by_id('User', 'id_user', turn_context.activity.recipient.id)
-
-        try:city = self.user.city
+    async def __send_intro_card(self, turn_context:TurnContext, user):
+        try:city = user.city
         except: city = 'Paris'
 
-        soup = bs4.BeautifulSoup(requests.get(f'https://www.msn.com/fr-fr/meteo/previsions/in-{city}').text, 'html.parser' )
-        img = soup.find('div', class_='summaryLineGroupCompact-E1_1').find('img').attrs['src']
-        temp = soup.find('div', class_='summaryLineGroupCompact-E1_1').find('a').attrs['title'].replace('\u200e', ' ')
-        prévison = soup.find('div', class_='summaryDescContainer-E1_1').find('p').text
+        # La météo est servie depuis le cache, la carte s'affiche sans météo si elle n'est pas encore connue
+        weather = self.weather.get(city)
+        prévison = "\n \n Prévious du jour : " + weather["prevision"] if weather else ""
 
         card = HeroCard(
             title="Bienvenue sur le bot de synthèse d'actualités !",
-            subtitle=f'Température actuelle à {city} : {temp}',
+            subtitle=f'Température actuelle à {city} : {weather["temp"]}' if weather else None,
             text="Bienvenue sur le bot de synthèse d'actualités !"
-            "\n \n Prévious du jour : " + prévison + "\n \n"
+            + prévison + "\n \n"
             "Ce bot est basé sur la technologie GPT-4."
             "Avant de débuter, je vais vous poser quelques questions afin de personnaliser votre expérience.",
             
-            images=[CardImage(url=img)],
+            images=[CardImage(url=weather["img"])] if weather else None,
             buttons=[
                 CardAction(
                     type=ActionTypes.open_url,
@@ -230,11 +333,17 @@ class YnovBot(ActivityHandler):
 
     #------------------ Connexion à la base de données ------------------# 
 
-    async def connexion(self, turn_context: TurnContext):
-        if self.user:
-            self.first_dialog = False
-            await turn_context.send_activity(MessageFactory.attachment(pickle.loads(self.user.picture)))
-            await turn_context.send_activity(MessageFactory.text(f"Bonjour {self.user.name}, Ravi de vous revoir !"))
+    # Profil de l'utilisateur de l'activité (None s'il n'en a pas), servi par le cache de ProfileStore
+    async def get_user(self, turn_context: TurnContext):
+        return await self.profiles.get(turn_context.activity.from_property.id)
+
+    async def connexion(self, turn_context: TurnContext, user):
+        if user:
+            data = await self.conversation_data_accessor.get(turn_context, ConversationData)
+            data.first_dialog = False
+            if user.picture:
+                await turn_context.send_activity(MessageFactory.attachment(user.picture))
+            await turn_context.send_activity(MessageFactory.text(f"Bonjour {user.name}, Ravi de vous revoir !"))
             return await self.intro(turn_context)
             
         else:
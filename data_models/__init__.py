@@ -1,6 +1,7 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
+from .conversation_data import ConversationData
 from .user_profile import UserProfile
 
-__all__ = ["UserProfile"]
+__all__ = ["ConversationData", "UserProfile"]
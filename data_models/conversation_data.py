@@ -0,0 +1,14 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+
+class ConversationData:
+    """
+      State of one conversation, stored in ConversationState.
+      fonctionality : str   --> Fonctionnalité du menu en cours (Actualité, Traduction, Profil) ou None
+      first_dialog : bool   --> True tant que la création du profil n'est pas terminée
+    """
+
+    def __init__(self, fonctionality: str = None, first_dialog: bool = True):
+        self.fonctionality = fonctionality
+        self.first_dialog = first_dialog
@@ -0,0 +1,22 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""
+Lancement multi-processus du bot :
+
+    gunicorn app:APP -c gunicorn.conf.py
+
+Chaque worker importe app.py et possède son propre BOT ; les états de conversation et d'utilisateur
+sont partagés par le fichier SQLite STATE_DB (SqliteStorage), le profil par la base database.db.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "aiohttp.GunicornWebWorker"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 600))
+
+# Pas de preload : les pools de threads et connexions SQLite créés à l'import ne survivent pas au fork
+preload_app = False
@@ -1,6 +1,14 @@
 # Copyright (c) Microsoft Corporation. All rights reserved.
 # Licensed under the MIT License.
 
-from . import dialog_helper
+import importlib
 
-__all__ = ["dialog_helper"]
+__all__ = ["admission", "audio_store", "background", "batcher", "blob_store", "cache", "dialog_helper", "http_client", "lazy", "llm_client", "metrics", "ner_engine", "news_extractor", "news_prewarm", "outbound", "profile_store", "prompt_builder", "sentences",
+           "single_flight", "sqlite_storage", "timing_middleware", "translation", "translation_cache", "tts", "weather"]
+
+
+# Les sous-modules sont importés à leur premier accès (helpers.weather, from helpers import cache...)
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
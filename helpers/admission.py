@@ -0,0 +1,96 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from .cache import LRUCache
+from .metrics import REGISTRY
+
+REJECTED = REGISTRY.counter("bot_rejected_total", "Activités refusées à l'entrée de /api/messages",
+                            labelnames=("reason",))
+
+
+class Rejected(Exception):
+    """ Activité refusée : reason vaut "overloaded", "queue_timeout" ou "rate_limited". """
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super(Rejected, self).__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limite le nombre d'activités traitées simultanément par le processus.
+    Au-delà de max_in_flight, les activités attendent dans une file courte ; si la file est pleine
+    ou l'attente trop longue, elles sont refusées (Rejected) au lieu de s'accumuler en mémoire.
+    max_in_flight : int     --> Nombre maximum d'activités en cours de traitement
+    max_queue : int         --> Nombre maximum d'activités en attente
+    queue_timeout : float   --> Attente maximale dans la file, en secondes
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 64, queue_timeout: float = 5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._semaphore = None
+        REGISTRY.gauge("bot_admission_in_flight", "Activités en cours de traitement", function=lambda: self.in_flight)
+        REGISTRY.gauge("bot_admission_queue_depth", "Activités en attente d'admission", function=lambda: self.waiting)
+
+    # Méthode pour traiter une activité dans la limite de concurrence : async with controller.admit(): ...
+    @asynccontextmanager
+    async def admit(self):
+        # Le sémaphore est créé dans la boucle d'évènements qui l'utilise
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                REJECTED.inc(reason="overloaded")
+                raise Rejected("overloaded", retry_after=self.queue_timeout)
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                REJECTED.inc(reason="queue_timeout")
+                raise Rejected("queue_timeout", retry_after=self.queue_timeout)
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+class RateLimiter:
+    """
+    Limiteur à seau de jetons par clé (utilisateur ou conversation) : chaque clé dispose de burst jetons,
+    regagnés au rythme de rate par seconde. Les clés inactives sont oubliées (un seau plein n'a pas besoin d'état).
+    rate : float    --> Jetons regagnés par seconde
+    burst : int     --> Capacité du seau
+    max_keys : int  --> Nombre maximum de clés suivies
+    """
+
+    def __init__(self, rate: float = 0.5, burst: int = 10, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = LRUCache(maxsize=max_keys, ttl=burst / rate if rate > 0 else None)
+
+    # Méthode pour consommer un jeton, lève Rejected si le seau est vide
+    def check(self, key: str):
+        now = time.monotonic()
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens < 1:
+            REJECTED.inc(reason="rate_limited")
+            raise Rejected("rate_limited", retry_after=(1 - tokens) / self.rate if self.rate > 0 else 60)
+        self._buckets.set(key, (tokens - 1, now))
@@ -0,0 +1,124 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .lazy import LazyModule
+from .metrics import timed
+from .single_flight import SingleFlight
+from .tts import GTTSBackend, chunk_text
+
+web = LazyModule("aiohttp.web")
+
+
+class AudioStore:
+    """
+    Stockage des fichiers audio de synthèse vocale, adressés par le hash de (texte, langue).
+    Une phrase déjà synthétisée n'est jamais resynthétisée ; les fichiers les moins récemment
+    utilisés sont supprimés au-delà de max_bytes.
+    Un texte long est découpé en morceaux de phrases synthétisés en parallèle puis mis bout à bout
+    (des trames MP3 consécutives forment un MP3 valide) : l'audio est prêt en la durée du plus long morceau.
+    directory : str      --> Dossier des fichiers audio
+    base_url : str       --> URL publique du bot, utilisée pour construire l'URL des fichiers
+    max_bytes : int      --> Taille maximale du dossier
+    max_workers : int    --> Nombre de synthèses simultanées (pool de threads)
+    backend              --> Moteur de synthèse (helpers.tts : GTTSBackend, LocalTTSBackend)
+    chunk_chars : int    --> Longueur maximale d'un morceau synthétisé seul (0 : texte synthétisé d'un bloc)
+    """
+
+    ROUTE = "/audio/{name}"
+    NAME = re.compile(r"^[0-9a-f]{32}\.mp3$")
+
+    def __init__(self, directory: str = "audio", base_url: str = "", max_bytes: int = 200 * 1024 * 1024,
+                 max_workers: int = 4, backend=None, chunk_chars: int = 100):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        self.max_bytes = max_bytes
+        self.backend = backend or GTTSBackend()
+        self.chunk_chars = chunk_chars
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts")
+        self._flight = SingleFlight()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def name(self, text: str, lang: str) -> str:
+        # Les fichiers gTTS gardent leur nom historique ; ceux des autres moteurs ne s'y mélangent pas
+        key = f"{lang}\0{text}" if self.backend.name == GTTSBackend.name else f"{self.backend.name}\0{lang}\0{text}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".mp3"
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def url(self, name: str) -> str:
+        return self.base_url + self.ROUTE.format(name=name)
+
+    # Méthode pour obtenir l'URL de l'audio d'un texte, en le synthétisant si besoin
+    async def synthesize(self, text: str, lang: str) -> str:
+        name = self.name(text, lang)
+        path = self.path(name)
+
+        try:
+            os.utime(path)  # marque le fichier comme récemment utilisé pour l'éviction
+        except FileNotFoundError:
+            # Absent ou supprimé par l'éviction (de ce worker ou d'un autre) : nouvelle synthèse
+            with timed("tts"):
+                await self._flight.do(name, lambda: self._render(text, lang, path))
+        return self.url(name)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # Synthèse des morceaux du texte en parallèle, dans le pool de threads, puis écriture du fichier
+    async def _render(self, text: str, lang: str, path: str):
+        chunks = chunk_text(text, self.chunk_chars) if self.chunk_chars else [text]
+        parts = await asyncio.gather(*[self._run(self.backend.synthesize, chunk, lang) for chunk in chunks])
+        await self._run(self._save, b"".join(parts), path)
+
+    def _save(self, data: bytes, path: str):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+        self._evict(keep=path)
+
+    # Suppression des fichiers les moins récemment utilisés au-delà de max_bytes
+    def _evict(self, keep: str = None):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and self.NAME.match(entry.name):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+    # Route aiohttp servant les fichiers (requêtes Range et cache HTTP gérés par FileResponse)
+    async def handle(self, req):
+        name = req.match_info["name"]
+        path = self.path(name)
+        if not self.NAME.match(name) or not os.path.exists(path):
+            raise web.HTTPNotFound()
+
+        # Le contenu d'un nom ne change jamais : il peut être mis en cache indéfiniment
+        return web.FileResponse(path, headers={"Content-Type": "audio/mpeg",
+                                               "Cache-Control": "public, max-age=31536000, immutable",
+                                               "ETag": f'"{name[:-4]}"'})
+
+    def close(self):
+        self._executor.shutdown(wait=False)
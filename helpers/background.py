@@ -0,0 +1,74 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import sys
+import traceback
+
+from .metrics import REGISTRY
+
+
+class BackgroundTasks:
+    """
+    Tâches de fond du processus (réponses différées) : au plus max_concurrency s'exécutent en même temps,
+    les suivantes attendent leur tour. Au-delà de max_pending tâches, spawn() refuse la tâche pour que
+    l'appelant la traite lui-même. close() annule les tâches restantes à l'arrêt du serveur.
+    max_concurrency : int --> Nombre maximum de tâches exécutées simultanément
+    max_pending : int     --> Nombre maximum de tâches en cours ou en attente
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_pending: int = 256):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.running = 0
+        self._tasks = set()
+        self._semaphore = None
+        self._closed = False
+        REGISTRY.gauge("bot_background_running", "Tâches de fond en cours d'exécution", function=lambda: self.running)
+        REGISTRY.gauge("bot_background_pending", "Tâches de fond en cours ou en attente",
+                       function=lambda: len(self._tasks))
+
+    def __len__(self):
+        return len(self._tasks)
+
+    # Méthode pour lancer factory() en tâche de fond, retourne False si la file est pleine ou le service arrêté
+    def spawn(self, factory) -> bool:
+        if self._closed or len(self._tasks) >= self.max_pending:
+            return False
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        task = asyncio.ensure_future(self._run(factory))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, factory):
+        async with self._semaphore:
+            self.running += 1
+            try:
+                await factory()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Une tâche de fond n'a personne à qui remonter l'erreur
+                print("\n [background task]", file=sys.stderr)
+                traceback.print_exc()
+            finally:
+                self.running -= 1
+
+    # Méthode pour attendre la fin des tâches en cours, au plus timeout secondes
+    async def join(self, timeout: float = None):
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    # Méthode pour annuler les tâches restantes (arrêt du serveur) ; grace : délai laissé pour finir
+    async def close(self, grace: float = 0):
+        self._closed = True
+        if grace and self._tasks:
+            await self.join(grace)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
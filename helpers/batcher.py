@@ -0,0 +1,111 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+
+class MicroBatcher:
+    """
+    Regroupe les demandes concurrentes en lots : les éléments soumis pendant une courte fenêtre
+    sont traités ensemble par un seul appel à process_batch.
+    process_batch : callable   --> Fonction (ou coroutine) list[élément] -> list[résultat], dans le même ordre.
+                                   Une fonction synchrone est exécutée dans executor, hors de la boucle d'évènements
+    max_batch_size : int       --> Taille maximale d'un lot
+    max_wait : float           --> Délai maximum d'attente d'autres éléments après le premier, en secondes
+    executor : Executor        --> Pool de threads/processus des fonctions synchrones (None : pool par défaut)
+    concurrency : int          --> Nombre de lots traités simultanément
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = 16, max_wait: float = 0.01, executor=None,
+                 concurrency: int = 1):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.concurrency = concurrency
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._worker = None
+        # Lots en cours de traitement, et éléments retirés de la file pour le lot en formation
+        self._dispatches = set()
+        self._collecting = []
+
+    # Méthode pour soumettre un élément et attendre son résultat
+    async def submit(self, item):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = self._collecting = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        self._collecting = []
+        return batch
+
+    async def _process(self, items: list) -> list:
+        if asyncio.iscoroutinefunction(self.process_batch):
+            return await self.process_batch(items)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.process_batch, items)
+
+    async def _dispatch(self, batch: list, slots: asyncio.Semaphore):
+        items = [item for item, _ in batch]
+        try:
+            results = await self._process(items)
+            if len(results) != len(items):
+                raise ValueError(f"process_batch returned {len(results)} results for {len(items)} items")
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            slots.release()
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            batch = await self._collect()
+            self.batches += 1
+            self.items += len(batch)
+            task = asyncio.ensure_future(self._dispatch(batch, slots))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    # Méthode pour arrêter le lot en formation et la file : les lots en cours se terminent,
+    # les éléments en attente reçoivent RuntimeError("batcher closed")
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        waiting, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        for _, future in waiting:
+            if not future.done():
+                future.set_exception(RuntimeError("batcher closed"))
+
+        if self._dispatches:
+            await asyncio.gather(*list(self._dispatches), return_exceptions=True)
@@ -0,0 +1,65 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from .lazy import LazyModule
+
+web = LazyModule("aiohttp.web")
+
+
+class BlobStore:
+    """
+    Stockage de fichiers sur disque adressés par le hash de leur contenu : un même contenu n'est écrit qu'une fois
+    et un nom ne désigne jamais deux contenus différents.
+    directory : str   --> Dossier des fichiers
+    base_url : str    --> URL publique du bot, utilisée pour construire l'URL des fichiers
+    """
+
+    ROUTE = "/pictures/{name}"
+    NAME = re.compile(r"^[0-9a-f]{32}\.[a-z0-9]+$")
+
+    def __init__(self, directory: str = "pictures", base_url: str = ""):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    @staticmethod
+    def name(content_hash: str, content_type: str) -> str:
+        extension = mimetypes.guess_extension(content_type or "") or ".bin"
+        return content_hash + (".jpg" if extension in (".jpe", ".jpeg") else extension)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def url(self, name: str) -> str:
+        return self.base_url + self.ROUTE.format(name=name)
+
+    # Méthode pour enregistrer un contenu, retourne son hash (bloquant : à appeler hors de la boucle d'évènements)
+    def put(self, data: bytes, content_type: str) -> str:
+        content_hash = self.hash(data)
+        path = self.path(self.name(content_hash, content_type))
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as file:
+                file.write(data)
+            os.replace(tmp, path)
+        return content_hash
+
+    # Route aiohttp servant les fichiers
+    async def handle(self, req):
+        name = req.match_info["name"]
+        path = self.path(name)
+        if not self.NAME.match(name) or not os.path.exists(path):
+            raise web.HTTPNotFound()
+
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return web.FileResponse(path, headers={"Content-Type": content_type,
+                                               "Cache-Control": "public, max-age=31536000, immutable"})
@@ -0,0 +1,61 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache en mémoire borné en taille (LRU) avec expiration des entrées (TTL).
+    maxsize : int  --> Nombre maximum d'entrées conservées
+    ttl : float    --> Durée de vie d'une entrée en secondes (None : pas d'expiration)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    # Méthode pour lire une entrée, None si absente ou expirée
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    # Méthode pour ajouter une entrée, en évinçant la moins récemment utilisée si besoin
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    # Méthode pour lister les entrées non expirées
+    def items(self) -> list:
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in list(self._data.items())
+                if expires_at is None or expires_at >= now]
+
+    def pop(self, key, default=None):
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        self._data.clear()
@@ -0,0 +1,153 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from .lazy import LazyModule
+from .metrics import REGISTRY
+
+aiohttp = LazyModule("aiohttp")
+
+CIRCUITS = REGISTRY.gauge("bot_circuit_state", "État du disjoncteur par hôte (0 : fermé, 1 : ouvert, 2 : essai)",
+                          labelnames=("host",))
+
+
+class HttpError(Exception):
+    """ Échec d'une requête vers un service externe (statut HTTP, délai dépassé, connexion impossible). """
+
+
+class CircuitOpen(HttpError):
+    """ Requête refusée sans appel : le disjoncteur de l'hôte est ouvert. """
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un service externe : après failure_threshold échecs consécutifs, les requêtes sont refusées
+    immédiatement pendant reset_timeout secondes ; une seule requête d'essai est ensuite autorisée,
+    qui referme le disjoncteur si elle réussit.
+    failure_threshold : int --> Nombre d'échecs consécutifs ouvrant le disjoncteur
+    reset_timeout : float   --> Durée d'ouverture avant une requête d'essai, en secondes
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+
+    def _set(self, state: int):
+        self.state = state
+        CIRCUITS.set(state, host=self.name)
+
+    # Méthode pour savoir si une requête peut partir
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set(self.HALF_OPEN)
+            return True
+        # Ouvert, ou requête d'essai déjà en cours
+        return False
+
+    def success(self):
+        self.failures = 0
+        if self.state != self.CLOSED:
+            self._set(self.CLOSED)
+
+    # Requête d'essai abandonnée (tour annulé) : la suivante pourra la retenter
+    def cancel(self):
+        if self.state == self.HALF_OPEN:
+            self._set(self.OPEN)
+
+    def failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set(self.OPEN)
+
+
+class HttpClient:
+    """
+    Client HTTP asynchrone partagé pour les pages externes (Bing, MSN) : connexions réutilisées (keep-alive),
+    cache DNS, nombre de connexions limité par hôte, délais stricts et un disjoncteur par hôte.
+    La session est créée par start() au démarrage du serveur (ou au premier appel) et fermée par close().
+    timeout : float         --> Délai maximum d'une requête, en secondes
+    connect_timeout : float --> Délai maximum d'établissement de la connexion, en secondes
+    limit : int             --> Nombre maximum de connexions ouvertes
+    limit_per_host : int    --> Nombre maximum de connexions ouvertes par hôte
+    dns_ttl : float         --> Durée de conservation des résolutions DNS, en secondes
+    failure_threshold : int --> Échecs consécutifs ouvrant le disjoncteur d'un hôte
+    reset_timeout : float   --> Durée d'ouverture d'un disjoncteur, en secondes
+    """
+
+    def __init__(self, timeout: float = 10, connect_timeout: float = 3, limit: int = 100, limit_per_host: int = 10,
+                 dns_ttl: float = 300, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self._session = None
+
+    @classmethod
+    def from_config(cls, config) -> "HttpClient":
+        """ Client paramétré par DefaultConfig (HTTP_*, CIRCUIT_*). """
+        return cls(timeout=config.HTTP_TIMEOUT, connect_timeout=config.HTTP_CONNECT_TIMEOUT, limit=config.HTTP_LIMIT,
+                   limit_per_host=config.HTTP_LIMIT_PER_HOST, dns_ttl=config.HTTP_DNS_TTL,
+                   failure_threshold=config.CIRCUIT_FAILURES, reset_timeout=config.CIRCUIT_RESET_TIMEOUT)
+
+    # La session est créée dans la boucle d'évènements qui l'utilise
+    def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             ttl_dns_cache=self.dns_ttl, use_dns_cache=True)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout))
+        return self._session
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    # Méthode pour lire une page, lève HttpError (ou CircuitOpen sans appel si l'hôte est en panne)
+    async def get_text(self, url: str, params: dict = None) -> str:
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpen(f"{breaker.name} : circuit open")
+
+        session = self.start()
+        try:
+            async with session.get(url, params=params) as resp:
+                text = await resp.text()
+                status = resp.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            breaker.failure()
+            raise HttpError(f"{breaker.name} : {type(error).__name__} {error}")
+        except asyncio.CancelledError:
+            breaker.cancel()
+            raise
+
+        if status >= 500:
+            breaker.failure()
+            raise HttpError(f"{breaker.name} : HTTP {status}")
+        breaker.success()
+        if status >= 400:
+            raise HttpError(f"{breaker.name} : HTTP {status}")
+        return text
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,25 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import importlib
+
+
+class LazyModule:
+    """
+    Module importé à son premier usage, pour ne pas payer le coût des dépendances lourdes
+    (transformers, sqlalchemy, bs4, gtts...) au démarrage du bot.
+    name : str --> Nom du module, ex : "sqlalchemy"
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule '{self._name}' ({state})>"
@@ -0,0 +1,135 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import time
+
+from .lazy import LazyModule
+from .metrics import SPANS, timed
+
+aiohttp = LazyModule("aiohttp")
+
+
+class LLMError(Exception):
+    """ Erreur renvoyée par l'API de complétion (statut HTTP, réponse invalide, délai dépassé). """
+
+
+class LLMClient:
+    """
+    Client asynchrone pour l'API Chat Completions d'OpenAI.
+    api_key : str          --> Clé d'API OpenAI
+    base_url : str         --> URL de l'API (permet de pointer vers un serveur local de test)
+    timeout : float        --> Délai maximum par défaut d'un appel, en secondes
+    max_concurrency : int  --> Nombre maximum d'appels simultanés pour tout le processus
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = "https://api.openai.com/v1",
+                 timeout: float = 30.0, max_concurrency: int = 64):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+
+    # La session et le sémaphore sont créés dans la boucle d'évènements qui les utilise
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _headers(self) -> dict:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    # Méthode pour obtenir une complétion
+    async def chat(self, messages: list, model: str = "gpt-3.5-turbo", max_tokens: int = None,
+                   temperature: float = None, timeout: float = None) -> str:
+        """
+        Envoie une conversation au modèle et retourne le contenu du premier message de réponse.
+        messages : list  --> [{"role": "system", "content": ...}, {"role": "user", "content": ...}]
+        timeout : float  --> Délai maximum de cet appel (par défaut celui du client)
+        """
+        payload = {"model": model, "messages": messages}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if temperature is not None:
+            payload["temperature"] = temperature
+
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        async with self._semaphore:
+            try:
+                with timed("llm_chat"):
+                    async with session.post(f"{self.base_url}/chat/completions", json=payload,
+                                            headers=self._headers(), timeout=client_timeout) as resp:
+                        if resp.status != 200:
+                            raise LLMError(f"Chat completion failed ({resp.status}) : {await resp.text()}")
+                        body = await resp.json()
+            except asyncio.TimeoutError:
+                raise LLMError(f"Chat completion timed out after {client_timeout.total}s")
+            except aiohttp.ClientError as error:
+                raise LLMError(f"Chat completion failed : {error}")
+
+        try:
+            return body["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise LLMError(f"Unexpected chat completion payload : {body}")
+
+    # Méthode pour obtenir une complétion au fil de l'eau
+    async def stream_chat(self, messages: list, model: str = "gpt-3.5-turbo", max_tokens: int = None,
+                          temperature: float = None, timeout: float = None):
+        """
+        Générateur asynchrone des fragments de texte de la réponse, dès leur réception (stream=True).
+        Mêmes paramètres que chat().
+        """
+        payload = {"model": model, "messages": messages, "stream": True}
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+        if temperature is not None:
+            payload["temperature"] = temperature
+
+        session = self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout or self.timeout)
+
+        async with self._semaphore:
+            start = time.perf_counter()
+            first = True
+            try:
+                # La durée du flux inclut le temps passé par l'appelant entre deux fragments
+                with timed("llm_stream"):
+                    async with session.post(f"{self.base_url}/chat/completions", json=payload,
+                                            headers=self._headers(), timeout=client_timeout) as resp:
+                        if resp.status != 200:
+                            raise LLMError(f"Chat completion failed ({resp.status}) : {await resp.text()}")
+
+                        # Flux server-sent events : une ligne "data: {...}" par fragment, "data: [DONE]" à la fin
+                        async for line in resp.content:
+                            line = line.decode("utf-8").strip()
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                delta = json.loads(data)["choices"][0].get("delta", {})
+                            except (ValueError, KeyError, IndexError, TypeError):
+                                raise LLMError(f"Unexpected chat completion chunk : {data}")
+                            if delta.get("content"):
+                                if first:
+                                    SPANS.observe(time.perf_counter() - start, span="llm_first_token", status="ok")
+                                    first = False
+                                yield delta["content"]
+            except asyncio.TimeoutError:
+                raise LLMError(f"Chat completion timed out after {client_timeout.total}s")
+            except aiohttp.ClientError as error:
+                raise LLMError(f"Chat completion failed : {error}")
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
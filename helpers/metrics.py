@@ -0,0 +1,204 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    values = ",".join('{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                      for key, value in labels.items())
+    return "{" + values + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class _Timer:
+    """ Contexte mesurant la durée d'un bloc (with), y compris les await qu'il contient. """
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = self.labels
+        if "status" in self.histogram.labelnames:
+            labels = dict(labels, status="error" if exc_type is not None else "ok")
+        self.histogram.observe(time.perf_counter() - self.start, **labels)
+        return False
+
+
+class Histogram:
+    """
+    Histogramme cumulatif au format Prometheus (buckets, somme, nombre), par combinaison de labels.
+    name : str          --> Nom de la métrique
+    help : str          --> Description
+    labelnames : tuple  --> Noms des labels ; un label "status" est rempli par time() (ok / error)
+    buckets : tuple     --> Bornes supérieures des buckets, en secondes
+    """
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    # Méthode pour enregistrer une mesure
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    # Méthode pour mesurer la durée d'un bloc : with histogram.time(span="llm"): ...
+    def time(self, **labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+
+        for key, counts, total, count in sorted(series):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_format_labels(dict(labels, le=_format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Compteur croissant au format Prometheus, par combinaison de labels.
+    name : str          --> Nom de la métrique (suffixe _total conseillé)
+    help : str          --> Description
+    labelnames : tuple  --> Noms des labels
+    """
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def _samples(self) -> list:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        for key, value in self._samples():
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """
+    Valeur instantanée au format Prometheus. Avec function, la valeur est lue à chaque rendu.
+    function : callable --> Fonction sans argument retournant la valeur (gauge sans label)
+    """
+
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), function=None):
+        super(Gauge, self).__init__(name, help, labelnames)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> list:
+        if self.function is not None:
+            return [((), self.function())]
+        return super(Gauge, self)._samples()
+
+
+class Registry:
+    """ Ensemble des métriques du processus, exposées par render() au format texte Prometheus. """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        """ Histogramme name, créé au premier appel. """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help, labelnames, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        """ Compteur name, créé au premier appel. """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help, labelnames)
+            return self._metrics[name]
+
+    def gauge(self, name: str, help: str, labelnames: tuple = (), function=None) -> Gauge:
+        """ Gauge name, créée au premier appel ; function remplace la fonction de lecture existante. """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Gauge(name, help, labelnames)
+            if function is not None:
+                self._metrics[name].function = function
+            return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TURNS = REGISTRY.histogram("bot_turn_seconds", "Durée de traitement d'une activité reçue par le bot",
+                           labelnames=("type", "status"))
+SPANS = REGISTRY.histogram("bot_span_seconds", "Durée des appels externes : LLM, pages web, synthèse vocale, "
+                                               "base de données, envois au Bot Connector",
+                           labelnames=("span", "status"))
+
+
+# Méthode pour mesurer une étape d'un tour : with timed("llm_chat"): ...
+def timed(span: str) -> _Timer:
+    return SPANS.time(span=span)
@@ -0,0 +1,66 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .batcher import MicroBatcher
+from .lazy import LazyModule
+
+transformers = LazyModule("transformers")
+
+
+class NEREngine:
+    """
+    Reconnaissance d'entités nommées partagée par tout le processus : le modèle est chargé une seule fois
+    et les phrases reçues simultanément sont traitées par lots dans un thread dédié.
+    model : str             --> Modèle Hugging Face (None : modèle par défaut de pipeline("ner"))
+    max_batch_size : int    --> Nombre maximum de phrases par lot
+    max_wait : float        --> Attente maximale d'autres phrases avant de lancer un lot, en secondes
+    """
+
+    _shared = None
+
+    def __init__(self, model: str = None, max_batch_size: int = 16, max_wait: float = 0.01):
+        self.model = model
+        self._pipeline = None
+        self._lock = threading.Lock()
+        # Un seul thread d'inférence : les lots sont traités l'un après l'autre par le même modèle
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ner")
+        self.batcher = MicroBatcher(self._infer, max_batch_size=max_batch_size, max_wait=max_wait,
+                                    executor=self._executor)
+
+    @classmethod
+    def shared(cls, **kwargs) -> "NEREngine":
+        """ Instance unique du processus, créée au premier appel avec les paramètres donnés. """
+        if cls._shared is None:
+            cls._shared = cls(**kwargs)
+        return cls._shared
+
+    # Chargement du modèle au premier usage
+    def load(self):
+        with self._lock:
+            if self._pipeline is None:
+                self._pipeline = (transformers.pipeline("ner", model=self.model) if self.model
+                                  else transformers.pipeline("ner"))
+        return self._pipeline
+
+    def _infer(self, phrases: list) -> list:
+        results = self.load()(list(phrases), batch_size=len(phrases))
+        # Pour une seule phrase, certaines versions de transformers ne renvoient pas de liste de listes
+        if len(phrases) == 1 and results and isinstance(results[0], dict):
+            results = [results]
+        return results
+
+    # Méthode pour extraire les entités d'une phrase
+    async def recognize(self, phrase: str) -> list:
+        """ Retourne la liste des entités de la phrase : [{"entity", "score", "word", "start", "end"}, ...] """
+        return await self.batcher.submit(phrase)
+
+    def stats(self) -> dict:
+        return {"batches": self.batcher.batches, "phrases": self.batcher.items,
+                "mean_batch_size": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0}
+
+    async def close(self):
+        await self.batcher.close()
+        self._executor.shutdown(wait=False)
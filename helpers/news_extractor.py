@@ -0,0 +1,54 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+from .lazy import LazyModule
+from .metrics import timed
+
+bs4 = LazyModule("bs4")
+
+
+# Parseur le plus rapide disponible : lxml s'il est installé, sinon celui de la bibliothèque standard
+def default_parser() -> str:
+    return "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+
+class NewsExtractor:
+    """
+    Extraction des articles (titre, lien) d'une page de résultats Bing News.
+    Seules les balises <a class="title"> sont construites (SoupStrainer) : le reste de la page est parcouru
+    sans créer d'arbre. L'analyse s'exécute dans un pool de threads pour ne pas bloquer la boucle d'évènements.
+    max_articles : int  --> Nombre maximum d'articles retournés
+    parser : str        --> Parseur BeautifulSoup ("lxml", "html.parser"), défaut : default_parser()
+    max_workers : int   --> Nombre de threads d'analyse
+    """
+
+    def __init__(self, max_articles: int = 20, parser: str = None, max_workers: int = 2):
+        self.max_articles = max_articles
+        self.parser = parser or default_parser()
+        self._strainer = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news")
+
+    # Méthode pour extraire les articles de la page, liste de (titre, lien)
+    def extract(self, html: str) -> list:
+        if self._strainer is None:
+            self._strainer = bs4.SoupStrainer("a", class_="title")
+        soup = bs4.BeautifulSoup(html, self.parser, parse_only=self._strainer)
+
+        articles = []
+        for article in soup.find_all("a", limit=self.max_articles):
+            articles.append((article.get_text(), article.get("href", "")))
+        soup.decompose()
+        return articles
+
+    async def extract_async(self, html: str) -> list:
+        """ extract() exécutée dans le pool de threads de l'extracteur. """
+        loop = asyncio.get_event_loop()
+        with timed("news_parse"):
+            return await loop.run_in_executor(self._executor, self.extract, html)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
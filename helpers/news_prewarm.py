@@ -0,0 +1,94 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import sys
+import time
+
+from .metrics import timed
+from .translation_cache import normalize_phrase
+
+
+class NewsPrewarmer:
+    """
+    Préchauffage des synthèses d'actualité les plus demandées.
+    record() compte les thématiques demandées (avec une décroissance exponentielle, pour suivre l'actualité du moment) ;
+    une tâche de fond recalcule périodiquement la synthèse et l'audio des top_k thématiques, qui sont alors
+    servies depuis le cache de ActuBot sans attendre le scraping, le LLM ni la synthèse vocale.
+    bot : ActuBot               --> Bot dont le cache d'actualités est alimenté (actualities(query, refresh=True))
+    top_k : int                 --> Nombre de thématiques préchauffées (0 : désactivé)
+    refresh_interval : float    --> Période de rafraîchissement en secondes, à garder sous NEWS_CACHE_TTL
+    max_concurrency : int       --> Nombre maximum de synthèses calculées simultanément
+    half_life : float           --> Demi-vie du score d'une thématique, en secondes
+    min_score : float           --> Score minimum pour être préchauffée (une demande isolée ne suffit pas)
+    max_topics : int            --> Nombre maximum de thématiques suivies
+    """
+
+    def __init__(self, bot, top_k: int = 5, refresh_interval: float = 240, max_concurrency: int = 2,
+                 half_life: float = 3600, min_score: float = 2, max_topics: int = 1024):
+        self.bot = bot
+        self.top_k = top_k
+        self.refresh_interval = refresh_interval
+        self.max_concurrency = max_concurrency
+        self.half_life = half_life
+        self.min_score = min_score
+        self.max_topics = max_topics
+        self.topics = {}
+        self._task = None
+
+    def _score(self, topic: list, now: float) -> float:
+        score, updated_at, _ = topic
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    # Méthode pour compter une demande de la thématique query
+    def record(self, query: str):
+        key = normalize_phrase(query)
+        if not key or not self.top_k:
+            return
+
+        now = time.monotonic()
+        topic = self.topics.get(key)
+        self.topics[key] = [(self._score(topic, now) if topic else 0) + 1, now, query]
+
+        # Les thématiques les moins demandées sont oubliées
+        if len(self.topics) > self.max_topics:
+            for old, _ in sorted(self.topics.items(), key=lambda item: self._score(item[1], now))[
+                    :len(self.topics) - self.max_topics]:
+                del self.topics[old]
+
+    # Thématiques les plus demandées, de la plus populaire à la moins populaire
+    def top(self) -> list:
+        now = time.monotonic()
+        scored = sorted(((self._score(topic, now), topic[2]) for topic in self.topics.values()), reverse=True)
+        return [query for score, query in scored[:self.top_k] if score >= self.min_score]
+
+    async def warm(self, query: str, slots: asyncio.Semaphore):
+        async with slots:
+            try:
+                with timed("news_prewarm"):
+                    await self.bot.actualities(query, refresh=True)
+            except Exception as error:
+                # La synthèse en cache (s'il y en a une) est conservée
+                print(f"Actualité : préchauffage de '{query}' impossible ({error})", file=sys.stderr)
+
+    async def refresh_all(self):
+        slots = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*[self.warm(query, slots) for query in self.top()])
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_all()
+
+    def start(self):
+        if self._task is None and self.top_k:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,97 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import List
+
+from botbuilder.core import BotFrameworkAdapter, TurnContext
+from botbuilder.schema import Activity, ActivityTypes, ResourceResponse
+
+from .metrics import timed
+
+
+def _is_plain_text(activity: Activity) -> bool:
+    return (activity.type == ActivityTypes.message and bool(activity.text) and not activity.attachments
+            and not activity.suggested_actions and not activity.speak and not activity.value)
+
+
+def merge_activities(activities: List[Activity], max_chars: int = 4000, separator: str = "\n\n") -> List[Activity]:
+    """
+    Fusionne chaque message texte simple dans le message qui le suit, tant que le texte reste sous max_chars :
+    plusieurs phrases puis une carte deviennent un seul message (texte, pièces jointes et suggestions de la carte).
+    L'ordre d'affichage est conservé, les autres activités sont laissées telles quelles.
+    """
+    merged = []
+    for activity in activities:
+        previous = merged[-1] if merged else None
+        if (previous is not None and _is_plain_text(previous) and activity.type == ActivityTypes.message
+                and len(previous.text) + len(separator) + len(activity.text or "") <= max_chars):
+            activity.text = previous.text + separator + activity.text if activity.text else previous.text
+            merged[-1] = activity
+        else:
+            merged.append(activity)
+    return merged
+
+
+class OutboundBuffer:
+    """
+    Tampon des activités envoyées pendant un tour : les envois du tour sont retenus par l'adaptateur
+    (BufferedBotFrameworkAdapter) puis envoyés par flush(), après fusion des messages texte consécutifs.
+    Chaque activité envoyée au Bot Connector est une requête HTTP : moins d'activités, moins d'allers-retours.
+    turn_context : TurnContext --> Tour dont les envois sont retenus
+    merge_text : bool          --> Fusionne les messages texte courts avec le message suivant
+    max_chars : int            --> Longueur maximale d'un texte fusionné
+    """
+
+    KEY = "OutboundBuffer"
+
+    def __init__(self, turn_context: TurnContext, merge_text: bool = True, max_chars: int = 4000):
+        self.turn_context = turn_context
+        self.merge_text = merge_text
+        self.max_chars = max_chars
+        self.holding = True
+        self.sent = 0
+        self._pending = []
+        turn_context.turn_state[self.KEY] = self
+
+    @classmethod
+    def get(cls, turn_context: TurnContext):
+        """ Tampon du tour, None si le tour n'en a pas. """
+        return turn_context.turn_state.get(cls.KEY)
+
+    # Méthode pour retenir des activités jusqu'au prochain flush
+    def hold(self, activities: List[Activity]) -> List[ResourceResponse]:
+        self._pending.extend(activities)
+        return [ResourceResponse(id=activity.id or "") for activity in activities]
+
+    # Méthode pour envoyer les activités retenues
+    async def flush(self) -> List[ResourceResponse]:
+        activities, self._pending = self._pending, []
+        if not activities:
+            return []
+        if self.merge_text:
+            activities = merge_activities(activities, self.max_chars)
+
+        self.holding = False
+        try:
+            self.sent += len(activities)
+            return await self.turn_context.adapter.send_activities(self.turn_context, activities)
+        finally:
+            self.holding = True
+
+    # Méthode pour envoyer les activités retenues et ne plus rien retenir (fin du tour)
+    async def close(self) -> List[ResourceResponse]:
+        try:
+            return await self.flush()
+        finally:
+            self.holding = False
+
+
+class BufferedBotFrameworkAdapter(BotFrameworkAdapter):
+    """ BotFrameworkAdapter dont les envois passent par l'OutboundBuffer du tour, s'il en a un. """
+
+    async def send_activities(self, context: TurnContext, activities: List[Activity]) -> List[ResourceResponse]:
+        outbound = OutboundBuffer.get(context)
+        if outbound is not None and outbound.holding:
+            return outbound.hold(activities)
+        with timed("send_activities"):
+            return await super().send_activities(context, activities)
@@ -0,0 +1,286 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import base64
+import pickle
+import re
+import sqlite3
+import sys
+import threading
+from collections import namedtuple
+from types import SimpleNamespace
+
+from botbuilder.schema import Attachment
+
+from .blob_store import BlobStore
+from .cache import LRUCache
+from .lazy import LazyModule
+
+db = LazyModule("sqlalchemy")
+
+# Profil prêt à l'emploi : picture est une Attachment déjà construite (ou None)
+Profile = namedtuple("Profile", ["id_user", "name", "age", "city", "transport", "picture"])
+
+# Colonnes de la table User, dans l'ordre des exports
+COLUMNS = ("id_user", "name", "age", "city", "transport", "picture_type", "picture_url", "picture_hash")
+
+DATA_URL = re.compile(r"^data:([\w/+.-]*)(?:;[^,]*)?;base64,(.*)$", re.DOTALL)
+
+
+def picture_columns(picture: Attachment, blobs: BlobStore) -> dict:
+    """
+    Colonnes picture_type / picture_url / picture_hash d'une image de profil.
+    Le contenu d'une image transmise dans le message (URL data:) est enregistré dans blobs,
+    une image hébergée ailleurs est conservée par son URL.
+    """
+    if picture is None:
+        return dict(picture_type=None, picture_url=None, picture_hash=None)
+
+    content_type = getattr(picture, "content_type", None)
+    url = getattr(picture, "content_url", None) or ""
+    match = DATA_URL.match(url)
+    if match:
+        content_type = match.group(1) or content_type
+        return dict(picture_type=content_type, picture_url=None,
+                    picture_hash=blobs.put(base64.b64decode(match.group(2)), content_type))
+    return dict(picture_type=content_type, picture_url=url or None, picture_hash=None)
+
+
+def unpickle_picture(value):
+    """
+    Attachment (ou None) d'une valeur de l'ancienne colonne picture.
+    Les versions précédentes enregistraient pickle.dumps(Attachment) dans une colonne PickleType,
+    soit deux niveaux de pickle : on dépickle tant que la valeur est binaire.
+    """
+    for _ in range(3):
+        if not isinstance(value, (bytes, bytearray)):
+            break
+        value = pickle.loads(value)
+    if value is not None and not hasattr(value, "content_url"):
+        raise ValueError(f"unexpected picture value of type {type(value).__name__}")
+    return value
+
+
+class ProfileStore:
+    """
+    Profils utilisateurs de la table User, avec un cache en lecture des profils récents.
+    L'image est stockée sous forme de métadonnées (type, URL ou hash du contenu dans blobs)
+    et le profil lu contient directement l'Attachment à envoyer.
+    Comme pour SqliteStorage, le cache est vidé dès que PRAGMA data_version indique que la base a été modifiée
+    par une autre connexion (autre worker) : un profil écrit par un worker est vu par les autres dès que son lot
+    est écrit, soit au plus flush_delay secondes après la modification.
+    Les créations, modifications et suppressions sont mises en attente puis écrites par lots, en une transaction
+    (executemany), flush_delay secondes après la première ; un profil en attente est lu depuis la mémoire.
+    flush() doit être appelée à l'arrêt du serveur.
+    database : AsyncDataBase  --> Base de données (config.AsyncDataBase) hébergeant la table
+    blobs : BlobStore         --> Stockage des images reçues dans les messages
+    maxsize : int             --> Nombre de profils gardés en mémoire
+    ttl : float               --> Durée de vie d'un profil en mémoire, en secondes (borne le décalage entre workers)
+    flush_delay : float       --> Attente d'autres écritures avant d'écrire un lot, en secondes
+    """
+
+    TABLE = "User"
+
+    def __init__(self, database, blobs: BlobStore, maxsize: int = 1024, ttl: float = 60, flush_delay: float = 0.05):
+        self.database = database
+        self.blobs = blobs
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.flush_delay = flush_delay
+        # id_user -> (colonnes, Profile) à écrire, ou (None, None) à supprimer
+        self._pending = {}
+        # Lot en cours d'écriture, encore lu depuis la mémoire
+        self._writing = {}
+        self._flush_task = None
+        # Connexion dédiée à PRAGMA data_version (SQLite uniquement ; sinon, seul ttl borne le décalage)
+        self._data_version = None
+        self._version_lock = threading.Lock()
+        self._version_connection = None
+        if self.database.sync.url.startswith("sqlite:///"):
+            self._version_connection = sqlite3.connect(self.database.sync.url[len("sqlite:///"):],
+                                                       timeout=15, check_same_thread=False)
+
+        picture = dict(picture_type=db.String, picture_url=db.String, picture_hash=db.String)
+        self.database.sync.create_table(self.TABLE,
+                                   id_user=db.String,
+                                   name=db.String,
+                                   age=db.Integer,
+                                   city=db.String,
+                                   transport=db.String,
+                                   **picture)
+        # Une base créée avant ces colonnes les reçoit ici (les images picklées : manage.py migrate-pictures)
+        self.database.sync.add_columns(self.TABLE, **picture)
+
+    # Méthode pour construire l'Attachment d'une ligne de la table
+    def attachment(self, row):
+        if row.picture_hash:
+            url = self.blobs.url(self.blobs.name(row.picture_hash, row.picture_type))
+        elif row.picture_url:
+            url = row.picture_url
+        else:
+            return None
+        return Attachment(content_type=row.picture_type, content_url=url)
+
+    # Méthode pour lire un profil, None si l'utilisateur n'en a pas
+    async def get(self, id_user: str):
+        # Les écritures en attente sont visibles immédiatement
+        for queue in (self._pending, self._writing):
+            if id_user in queue:
+                return queue[id_user][1]
+
+        if self._version_connection is not None:
+            data_version = await self.database.run(self._read_data_version)
+            if data_version != self._data_version:
+                self.cache.clear()
+                self._data_version = data_version
+
+        profile = self.cache.get(id_user)
+        if profile is not None:
+            return profile
+
+        row = await self.database.read_table_by_id(self.TABLE, 'id_user', id_user)
+        if row is None:
+            return None
+
+        profile = Profile(row.id_user, row.name, row.age, row.city, row.transport, self.attachment(row))
+        self.cache.set(id_user, profile)
+        return profile
+
+    def _read_data_version(self) -> int:
+        with self._version_lock:
+            return self._version_connection.execute("PRAGMA data_version").fetchone()[0]
+
+    # Méthode pour créer ou remplacer un profil
+    async def save(self, id_user: str, name: str, age: int, city: str, transport: str, picture: Attachment = None):
+        loop = asyncio.get_running_loop()
+        values = dict(name=name, age=age, city=city, transport=transport,
+                      **await loop.run_in_executor(None, picture_columns, picture, self.blobs))
+
+        # Le profil écrit est retourné depuis la mémoire, sans relecture de la table
+        profile = Profile(id_user, name, age, city, transport, self.attachment(SimpleNamespace(**values)))
+        self.cache.set(id_user, profile)
+        self._enqueue(id_user, values, profile)
+        return profile
+
+    # Méthode pour supprimer un profil
+    async def delete(self, id_user: str):
+        self.cache.pop(id_user)
+        self._enqueue(id_user, None, None)
+
+    #------------------ Écriture différée ------------------#
+
+    def _enqueue(self, id_user: str, values, profile):
+        self._pending[id_user] = (values, profile)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush(self.flush_delay))
+            self._flush_task.add_done_callback(self._report)
+
+    @staticmethod
+    def _report(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"ProfileStore : écriture des profils impossible ({task.exception()})", file=sys.stderr)
+
+    # Écriture d'un lot en une transaction : suppression des lignes concernées puis insertion des profils
+    def _write(self, batch: dict):
+        engine = self.database.sync.engine
+        table = self.database.sync.read_table(self.TABLE)
+        rows = [dict(values, id_user=id_user) for id_user, values in batch.items() if values is not None]
+        with engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.id_user == db.bindparam("key")),
+                               [{"key": id_user} for id_user in batch])
+            if rows:
+                connection.execute(table.insert(), rows)
+
+    async def _flush(self, delay: float = 0):
+        if delay:
+            await asyncio.sleep(delay)
+        # Les écritures reçues pendant un lot forment le lot suivant
+        while self._pending:
+            self._writing, self._pending = self._pending, {}
+            try:
+                await self.database.run(self._write, {id_user: values
+                                                      for id_user, (values, _) in self._writing.items()})
+            except Exception:
+                # Les écritures non remplacées entre-temps seront retentées au prochain flush
+                for id_user, item in self._writing.items():
+                    self._pending.setdefault(id_user, item)
+                raise
+            finally:
+                self._writing = {}
+
+    async def flush(self):
+        """ Écrit les profils en attente (à l'arrêt du serveur notamment), lève une exception en cas d'échec. """
+        if self._flush_task is not None and not self._flush_task.done():
+            # Le lot en cours est terminé avant d'écrire le reste ; son échec est déjà signalé par _report
+            await asyncio.wait([self._flush_task])
+        await self._flush()
+
+    def close(self):
+        if self._version_connection is not None:
+            self._version_connection.close()
+            self._version_connection = None
+
+    #------------------ Import / export ------------------#
+
+    # Méthode pour lire toutes les lignes de la table (manage.py export)
+    def export_rows(self) -> list:
+        return [{column: getattr(row, column) for column in COLUMNS}
+                for row in self.database.sync.select_table(self.TABLE)]
+
+    # Méthode pour créer ou remplacer des profils par lots (manage.py import), retourne le nombre de lignes
+    def import_rows(self, rows, batch_size: int = 500) -> int:
+        count, batch = 0, {}
+        for row in rows:
+            batch[str(row["id_user"])] = {column: row.get(column) for column in COLUMNS if column != "id_user"}
+            if len(batch) >= batch_size:
+                self._write(batch)
+                count, batch = count + len(batch), {}
+        if batch:
+            self._write(batch)
+            count += len(batch)
+        self.cache.clear()
+        return count
+
+    # Méthode pour convertir les images picklées de l'ancienne colonne picture
+    def migrate_pictures(self) -> int:
+        """
+        Remplace l'Attachment picklé de chaque ligne par ses métadonnées, puis supprime la colonne picture.
+        Retourne le nombre de lignes converties. Bloquant : à lancer hors du serveur (manage.py migrate-pictures).
+        """
+        engine = self.database.sync.engine
+        if "picture" not in [column["name"] for column in db.inspect(engine).get_columns(self.TABLE)]:
+            return 0
+
+        # Identifiants cités selon le dialecte (SQLite ou MySQL)
+        table = engine.dialect.identifier_preparer.quote(self.TABLE)
+        with engine.connect() as connection:
+            rows = connection.execute(
+                db.text(f'SELECT id_user, picture FROM {table} WHERE picture IS NOT NULL')).fetchall()
+
+        migrated, failed = 0, 0
+        for id_user, picture in rows:
+            try:
+                values = picture_columns(unpickle_picture(picture), self.blobs)
+            except Exception as error:
+                # La ligne garde son image picklée et la colonne n'est pas supprimée
+                print(f"Profil '{id_user}' : image illisible, non migrée ({error})", file=sys.stderr)
+                failed += 1
+                continue
+            with engine.begin() as connection:
+                connection.execute(db.text(f'UPDATE {table} SET picture_type = :picture_type, '
+                                           'picture_url = :picture_url, picture_hash = :picture_hash, '
+                                           'picture = NULL WHERE id_user = :id_user'),
+                                   dict(values, id_user=id_user))
+            self.cache.pop(id_user)
+            migrated += 1
+
+        if failed:
+            print(f"Colonne picture conservée : {failed} profil(s) non migré(s)", file=sys.stderr)
+            return migrated
+        try:
+            with engine.begin() as connection:
+                connection.execute(db.text(f'ALTER TABLE {table} DROP COLUMN picture'))
+        except db.exc.OperationalError as error:
+            # SQLite < 3.35 : la colonne reste, vide
+            print(f"Colonne picture conservée ({error})", file=sys.stderr)
+        return migrated
@@ -0,0 +1,134 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import math
+import re
+import unicodedata
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .lazy import LazyModule
+from .translation_cache import normalize_phrase
+
+tiktoken = LazyModule("tiktoken")
+
+# Paramètres de suivi retirés des liens sources : ils n'apportent rien au LLM et coûtent des tokens
+TRACKING_PARAMS = re.compile(r"^(utm_.*|ocid|cvid|ei|form|fbclid|gclid|xtor|at_.*|src|ref|cmp|origin)$", re.I)
+
+Prompt = namedtuple("Prompt", ["text", "kept", "total", "tokens", "raw_tokens"])
+
+
+class TokenCounter:
+    """
+    Nombre de tokens d'un texte pour un modèle OpenAI, compté avec tiktoken.
+    tiktoken est chargé au premier comptage ; s'il est absent ou si l'encodage est indisponible (hors ligne),
+    le compte est estimé à un token pour trois caractères, une borne prudente pour le français.
+    model : str --> Modèle dont l'encodage est utilisé
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            self._encoding = tiktoken.encoding_for_model(self.model)
+        except Exception:
+            self._encoding = None
+
+    def count(self, text: str) -> int:
+        if not self._loaded:
+            self._load()
+        if self._encoding is None:
+            return math.ceil(len(text) / 3)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    @property
+    def exact(self) -> bool:
+        """ True si les tokens sont comptés par tiktoken. """
+        if not self._loaded:
+            self._load()
+        return self._encoding is not None
+
+
+def _words(text: str) -> set:
+    text = unicodedata.normalize("NFKD", normalize_phrase(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return {word for word in re.findall(r"\w+", text) if len(word) > 2}
+
+
+def compact_url(url: str, max_chars: int = 100) -> str:
+    """
+    Lien source raccourci : paramètres de suivi et fragment retirés ; au-delà de max_chars,
+    seule l'adresse de la page (sans paramètres) est conservée.
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    query = urlencode([(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if not TRACKING_PARAMS.match(key)])
+    compact = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+    if len(compact) > max_chars:
+        compact = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+    return compact
+
+
+class NewsPromptBuilder:
+    """
+    Liste des actualités envoyée au LLM pour la synthèse, dans un budget de tokens :
+    les titres quasi identiques sont retirés, les articles classés par pertinence pour la thématique
+    (ordre de Bing à égalité) puis ajoutés tant que le budget le permet.
+    max_tokens : int          --> Budget de tokens de la liste des actualités
+    dedup_threshold : float   --> Similarité (Jaccard des mots) au-delà de laquelle deux titres sont des doublons
+    url_max_chars : int       --> Longueur maximale d'un lien source (compact_url)
+    model : str               --> Modèle dont l'encodage sert au comptage des tokens
+    """
+
+    def __init__(self, max_tokens: int = 1000, dedup_threshold: float = 0.7, url_max_chars: int = 100,
+                 model: str = "gpt-3.5-turbo"):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.url_max_chars = url_max_chars
+        self.tokens = TokenCounter(model)
+
+    @staticmethod
+    def line(title: str, href: str) -> str:
+        return "- " + title.strip() + f" | Sources : {href}" + ' \n'
+
+    # Méthode pour retirer les articles dont le titre ou le lien est déjà présent
+    def deduplicate(self, articles: list) -> list:
+        kept, seen_words, seen_urls = [], [], set()
+        for title, href in articles:
+            words = _words(title)
+            if href in seen_urls or any(len(words & other) / max(1, len(words | other)) >= self.dedup_threshold
+                                        for other in seen_words):
+                continue
+            kept.append((title, href))
+            seen_words.append(words)
+            seen_urls.add(href)
+        return kept
+
+    # Méthode pour classer les articles : nombre de mots de la thématique présents dans le titre
+    @staticmethod
+    def rank(query: str, articles: list) -> list:
+        query_words = _words(query)
+        scored = [(-len(query_words & _words(title)), index, (title, href))
+                  for index, (title, href) in enumerate(articles)]
+        return [article for _, _, article in sorted(scored)]
+
+    def build(self, query: str, articles: list) -> Prompt:
+        """ Liste des actualités (articles : liste de (titre, lien)) et tailles avant et après réduction. """
+        raw_tokens = self.tokens.count(' '.join(self.line(title, href) for title, href in articles))
+
+        lines, tokens = [], 0
+        for title, href in self.rank(query, self.deduplicate(articles)):
+            line = self.line(title, compact_url(href, self.url_max_chars))
+            cost = self.tokens.count(line)
+            if lines and tokens + cost > self.max_tokens:
+                break
+            lines.append(line)
+            tokens += cost
+        return Prompt(' '.join(lines), len(lines), len(articles), tokens, raw_tokens)
@@ -0,0 +1,30 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import re
+
+# Fin de phrase : ponctuation finale suivie d'un espace (les URL "www.site.fr" ne sont pas coupées)
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def split_sentences(text: str) -> list:
+    """ Découpe un texte en phrases, en conservant leur ponctuation. """
+    return [sentence.strip() for sentence in SENTENCE_END.split(text or "") if sentence.strip()]
+
+
+async def iter_sentences(chunks):
+    """
+    Regroupe un flux asynchrone de fragments de texte en phrases complètes.
+    Chaque phrase est produite dès que la suivante commence ; le reste est produit à la fin du flux.
+    """
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        parts = SENTENCE_END.split(buffer)
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+
+    if buffer.strip():
+        yield buffer.strip()
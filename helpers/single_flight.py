@@ -0,0 +1,35 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents portant sur la même clé : le premier appel lance le calcul,
+    les suivants attendent le même futur au lieu de le relancer.
+    """
+
+    def __init__(self):
+        self._futures = {}
+
+    def in_flight(self, key) -> bool:
+        return key in self._futures
+
+    # Méthode pour obtenir le futur associé à une clé, en lançant le calcul s'il n'existe pas
+    def future(self, key, factory) -> asyncio.Future:
+        """
+        key : hashable          --> Clé identifiant le calcul
+        factory : callable      --> Fonction sans argument retournant la coroutine à exécuter
+        """
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._futures[key] = future
+            future.add_done_callback(lambda _: self._futures.pop(key, None))
+        return future
+
+    # Méthode pour exécuter (ou rejoindre) le calcul associé à une clé
+    async def do(self, key, factory):
+        # shield : l'annulation d'un appelant n'interrompt pas le calcul partagé
+        return await asyncio.shield(self.future(key, factory))
@@ -0,0 +1,226 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import sqlite3
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import jsonpickle
+from botbuilder.core import Storage
+
+from .cache import LRUCache
+from .metrics import timed
+
+
+def _get_e_tag(item):
+    if isinstance(item, dict):
+        return item.get("e_tag")
+    return getattr(item, "e_tag", None)
+
+
+def _set_e_tag(item, e_tag: str):
+    if isinstance(item, dict):
+        item["e_tag"] = e_tag
+    else:
+        item.e_tag = e_tag
+
+
+class SqliteStorage(Storage):
+    """
+    Storage botbuilder persistant dans un fichier SQLite, avec contrôle de concurrence optimiste (e_tag).
+    Les écritures d'un même tour sont regroupées par clé et validées en une seule transaction (flush),
+    et les lectures passent par un petit cache des clés récentes.
+    L'e_tag est vérifié clé par clé : une clé en conflit n'est pas écrite, les autres clés du lot sont validées,
+    et seul le tour qui attend cette clé (flush(keys)) reçoit le KeyError.
+    path : str          --> Fichier SQLite
+    cache_size : int    --> Nombre de clés gardées dans le cache de lecture
+
+    Le cache reste valable entre plusieurs processus : il est vidé dès que PRAGMA data_version indique
+    qu'une autre connexion a modifié la base.
+    """
+
+    def __init__(self, path: str = "bot_state.db", cache_size: int = 512):
+        super(SqliteStorage, self).__init__()
+        self.path = path
+        self._cache = LRUCache(maxsize=cache_size)
+        self._pending = {}
+        # Lot en cours de validation, avec la même structure que _pending
+        self._writing = {}
+        self._flush_task = None
+        self._data_version = None
+        # Un seul thread possède la connexion : les accès SQLite sont sérialisés hors de la boucle d'évènements
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._connection = None
+        self._executor.submit(self._connect).result()
+
+    def _connect(self):
+        self._connection = sqlite3.connect(self.path, timeout=15, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS bot_state (key TEXT PRIMARY KEY, e_tag TEXT NOT NULL, data TEXT NOT NULL)")
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        with timed(f"state{func.__name__}"):
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    #------------------ Lecture ------------------#
+
+    def _check_cache(self):
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._cache.clear()
+            self._data_version = data_version
+
+    def _read(self, keys: List[str]) -> Dict[str, str]:
+        self._check_cache()
+        found = {key: self._cache.get(key) for key in keys if self._cache.get(key) is not None}
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            rows = self._connection.execute(
+                f"SELECT key, data FROM bot_state WHERE key IN ({','.join('?' * len(missing))})", missing)
+            for key, data in rows:
+                self._cache.set(key, data)
+                found[key] = data
+        return found
+
+    async def read(self, keys: List[str]):
+        if not keys:
+            return {}
+
+        # Les écritures en attente sont visibles immédiatement
+        data = {key: self._pending[key][0] for key in keys if key in self._pending}
+        missing = [key for key in keys if key not in data]
+        if missing:
+            data.update(await self._run(self._read, missing))
+        return {key: jsonpickle.decode(value) for key, value in data.items()}
+
+    #------------------ Écriture ------------------#
+
+    async def write(self, changes):
+        if changes is None:
+            raise Exception("Changes are required when writing")
+
+        for key, change in changes.items():
+            e_tag = _get_e_tag(change)
+            if e_tag == "":
+                raise Exception("sqlite_storage.write(): etag missing")
+            # Une écriture en attente est l'état le plus récent de la clé : l'e_tag doit être le sien
+            if key in self._pending and e_tag is not None and e_tag != "*" and e_tag != self._pending[key][2]:
+                raise KeyError(f"Etag conflict.\nOriginal: {e_tag}\r\nCurrent: {self._pending[key][2]}")
+
+        for key, change in changes.items():
+            e_tag = _get_e_tag(change)
+            # e_tag attendu en base : celui de l'écriture en attente la plus ancienne sur cette clé
+            if key in self._pending:
+                _, expected, _, done = self._pending[key]
+            else:
+                expected, done = e_tag, self._waiter()
+            new_e_tag = uuid.uuid4().hex
+            _set_e_tag(change, new_e_tag)
+            self._pending[key] = (jsonpickle.encode(change), expected, new_e_tag, done)
+
+        # Les écritures successives d'un même tour sont regroupées dans un seul flush
+        if self._pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self._flush())
+            self._flush_task.add_done_callback(self._report)
+
+    @staticmethod
+    def _report(task: asyncio.Task):
+        # Une erreur de flush non attendue par flush() ne doit pas passer inaperçue
+        if not task.cancelled() and task.exception() is not None:
+            print(f"SqliteStorage : flush failed ({task.exception()})", file=sys.stderr)
+
+    # Future résolue quand l'écriture d'une clé est validée (ou refusée)
+    @staticmethod
+    def _waiter() -> asyncio.Future:
+        done = asyncio.get_event_loop().create_future()
+        # Un conflit que personne n'attend est déjà signalé par le tour qui l'a provoqué
+        done.add_done_callback(lambda future: future.cancelled() or future.exception())
+        return done
+
+    def _commit(self, pending: dict) -> dict:
+        """ Écrit le lot en une transaction et retourne les clés refusées (conflit d'e_tag) avec leur erreur. """
+        conflicts = {}
+        cursor = self._connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for key, (data, expected, new_e_tag, _) in pending.items():
+                if expected is not None and expected != "*":
+                    row = cursor.execute("SELECT e_tag FROM bot_state WHERE key = ?", (key,)).fetchone()
+                    if row is not None and row[0] != expected:
+                        conflicts[key] = KeyError(f"Etag conflict.\nOriginal: {expected}\r\nCurrent: {row[0]}")
+                        continue
+                cursor.execute("INSERT OR REPLACE INTO bot_state (key, e_tag, data) VALUES (?, ?, ?)",
+                               (key, new_e_tag, data))
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            for key in pending:
+                self._cache.pop(key)
+            raise
+
+        for key, (data, _, _, _) in pending.items():
+            if key in conflicts:
+                self._cache.pop(key)
+            else:
+                self._cache.set(key, data)
+        return conflicts
+
+    async def _flush(self):
+        # Les écritures reçues pendant un lot forment le lot suivant
+        while self._pending:
+            self._writing, self._pending = self._pending, {}
+            try:
+                conflicts = await self._run(self._commit, self._writing)
+            except Exception as error:
+                print(f"SqliteStorage : flush failed ({error})", file=sys.stderr)
+                conflicts = {key: error for key in self._writing}
+            for key, (_, _, _, done) in self._writing.items():
+                if done.done():
+                    continue
+                if key in conflicts:
+                    done.set_exception(conflicts[key])
+                else:
+                    done.set_result(None)
+            self._writing = {}
+
+    async def flush(self, keys: List[str] = None):
+        """
+        Valide les écritures en attente et attend celles des clés keys (toutes par défaut).
+        Lève KeyError si l'une de ces clés est en conflit d'e_tag ; les écritures des autres clés ne sont pas perdues.
+        """
+        waiting = [item[3] for queue in (self._writing, self._pending) for key, item in queue.items()
+                   if keys is None or key in keys]
+        if self._pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self._flush())
+            self._flush_task.add_done_callback(self._report)
+        # Le premier conflit est levé une fois toutes les écritures attendues terminées
+        for error in await asyncio.gather(*[asyncio.shield(done) for done in waiting], return_exceptions=True):
+            if isinstance(error, BaseException):
+                raise error
+
+    #------------------ Suppression ------------------#
+
+    def _delete(self, keys: List[str]):
+        self._connection.execute(f"DELETE FROM bot_state WHERE key IN ({','.join('?' * len(keys))})", keys)
+        for key in keys:
+            self._cache.pop(key)
+
+    async def delete(self, keys: List[str]):
+        if not keys:
+            return
+        for key in keys:
+            item = self._pending.pop(key, None)
+            if item is not None and not item[3].done():
+                item[3].set_result(None)
+        await self._run(self._delete, list(keys))
+
+    def close(self):
+        self._executor.submit(self._connection.close).result()
+        self._executor.shutdown(wait=True)
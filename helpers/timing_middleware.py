@@ -0,0 +1,18 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+from typing import Awaitable, Callable
+
+from botbuilder.core import Middleware, TurnContext
+
+from .metrics import TURNS
+
+
+class TimingMiddleware(Middleware):
+    """ Middleware de l'adaptateur mesurant la durée de chaque tour (histogramme bot_turn_seconds, par type d'activité). """
+
+    async def on_turn(self, context: TurnContext, logic: Callable[[TurnContext], Awaitable]):
+        # Les tours de continue_conversation (réponses différées) portent un ActivityTypes, pas une chaîne
+        activity_type = getattr(context.activity.type, "value", context.activity.type) or "unknown"
+        with TURNS.time(type=activity_type):
+            await logic()
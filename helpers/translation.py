@@ -0,0 +1,281 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .batcher import MicroBatcher
+from .lazy import LazyModule
+
+transformers = LazyModule("transformers")
+
+
+class LLMTranslationBackend:
+    """
+    Traduction du français vers l'anglais par le LLM (une ChatCompletion par phrase).
+    llm : LLMClient      --> Client du LLM
+    model : str          --> Modèle de traduction
+    max_tokens : int     --> Longueur maximale de la traduction
+    """
+
+    name = "llm"
+    # Version du prompt, fait partie de la clé des traductions en cache
+    prompt_version = 1
+
+    def __init__(self, llm, model: str = "gpt-3.5-turbo", max_tokens: int = 50):
+        self.llm = llm
+        self.model = model
+        self.max_tokens = max_tokens
+
+    # Modèle sous lequel les traductions de ce moteur sont mises en cache
+    @property
+    def cache_model(self) -> str:
+        return self.model
+
+    # Clés (modèle, version du prompt) sous lesquelles une traduction de ce moteur peut être en cache
+    @property
+    def cache_keys(self) -> list:
+        return [(self.cache_model, self.prompt_version)]
+
+    # Méthode pour traduire un texte, retourne (traduction, version du prompt utilisé)
+    async def translate_versioned(self, phrase: str):
+        return await self.translate(phrase), self.prompt_version
+
+    async def translate(self, phrase: str) -> str:
+        return await self.llm.chat(
+            model=self.model,
+            messages = [
+            {"role": "system", "content": "Tu es un traducteur professionnel qui traduit du Français vers l'anglais"},
+            {"role": "user", "content": f"Traduire le texte suivant de français : '{phrase}'"}],
+            temperature=0.5,
+            max_tokens=self.max_tokens,
+        )
+
+    async def close(self):
+        pass
+
+
+def parse_translations(content: str, count: int) -> list:
+    """ Tableau JSON de count traductions renvoyé par le LLM, ValueError s'il est malformé. """
+    # Le modèle entoure parfois sa réponse d'un bloc de code Markdown
+    content = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", content or "")
+    translations = json.loads(content)
+    if (not isinstance(translations, list) or len(translations) != count
+            or not all(isinstance(translation, str) for translation in translations)):
+        raise ValueError(f"expected a JSON array of {count} strings")
+    return translations
+
+
+class BatchedLLMTranslationBackend(LLMTranslationBackend):
+    """
+    Traduction par le LLM avec regroupement des demandes : les phrases reçues pendant une courte fenêtre
+    sont envoyées dans une seule ChatCompletion qui renvoie un tableau JSON de traductions, dans le même ordre.
+    Si la réponse groupée est malformée, chaque phrase du lot est traduite par un appel séparé.
+    Une phrase seule dans son lot, ou retraduite après une réponse malformée, utilise le prompt par phrase :
+    sa traduction est mise en cache sous la version de ce prompt.
+    max_batch_size : int    --> Nombre maximum de phrases par appel
+    max_wait : float        --> Attente maximale d'autres phrases avant l'appel, en secondes
+    concurrency : int       --> Nombre d'appels groupés simultanés
+    """
+
+    # Le prompt groupé (tableau JSON) a son propre espace dans le cache, distinct du prompt par phrase
+    prompt_version = 2
+
+    SYSTEM = ("Tu es un traducteur professionnel qui traduit du Français vers l'anglais. "
+              "Tu reçois un tableau JSON de textes et tu réponds uniquement par un tableau JSON "
+              "de leurs traductions, dans le même ordre.")
+
+    def __init__(self, llm, model: str = "gpt-3.5-turbo", max_tokens: int = 50, max_batch_size: int = 8,
+                 max_wait: float = 0.02, concurrency: int = 8):
+        super(BatchedLLMTranslationBackend, self).__init__(llm, model=model, max_tokens=max_tokens)
+        self.fallbacks = 0
+        self.batcher = MicroBatcher(self._translate_batch, max_batch_size=max_batch_size, max_wait=max_wait,
+                                    concurrency=concurrency)
+
+    @property
+    def cache_keys(self) -> list:
+        return [(self.cache_model, self.prompt_version), (self.cache_model, LLMTranslationBackend.prompt_version)]
+
+    # Traduction d'une phrase par le prompt par phrase
+    async def _translate_single(self, phrase: str):
+        translation = await super(BatchedLLMTranslationBackend, self).translate(phrase)
+        return translation, LLMTranslationBackend.prompt_version
+
+    # Lot de phrases -> liste de (traduction, version du prompt utilisé)
+    async def _translate_batch(self, phrases: list) -> list:
+        if len(phrases) == 1:
+            return [await self._translate_single(phrases[0])]
+
+        content = await self.llm.chat(
+            model=self.model,
+            messages=[{"role": "system", "content": self.SYSTEM},
+                      {"role": "user", "content": json.dumps(phrases, ensure_ascii=False)}],
+            temperature=0.5,
+            max_tokens=self.max_tokens * len(phrases) + 20,
+        )
+        try:
+            return [(translation, self.prompt_version) for translation in parse_translations(content, len(phrases))]
+        except ValueError as error:
+            print(f"Traduction groupée malformée, {len(phrases)} appels séparés ({error})", file=sys.stderr)
+            self.fallbacks += 1
+            return await asyncio.gather(*[self._translate_single(phrase) for phrase in phrases])
+
+    async def translate_versioned(self, phrase: str):
+        return await self.batcher.submit(phrase)
+
+    async def translate(self, phrase: str) -> str:
+        translation, _ = await self.translate_versioned(phrase)
+        return translation
+
+    def stats(self) -> dict:
+        return {"batches": self.batcher.batches, "phrases": self.batcher.items, "fallbacks": self.fallbacks,
+                "mean_batch_size": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0}
+
+    async def close(self):
+        await self.batcher.close()
+
+
+class LocalTranslationBackend:
+    """
+    Traduction du français vers l'anglais sur CPU par un modèle seq2seq local (MarianMT).
+    Comme NEREngine, le modèle est chargé une seule fois et les phrases reçues simultanément
+    sont traduites par lots dans un thread dédié.
+    model : str             --> Modèle Hugging Face de traduction, ex : "Helsinki-NLP/opus-mt-fr-en"
+    max_batch_size : int    --> Nombre maximum de phrases par lot
+    max_wait : float        --> Attente maximale d'autres phrases avant de lancer un lot, en secondes
+    max_length : int        --> Longueur maximale de la traduction, en tokens
+    """
+
+    name = "local"
+    prompt_version = 1
+    _shared = {}
+
+    def __init__(self, model: str = "Helsinki-NLP/opus-mt-fr-en", max_batch_size: int = 16, max_wait: float = 0.01,
+                 max_length: int = 128):
+        self.model = model
+        self.max_length = max_length
+        self._pipeline = None
+        self._lock = threading.Lock()
+        # Un seul thread d'inférence : les lots sont traités l'un après l'autre par le même modèle
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translation")
+        self.batcher = MicroBatcher(self._infer, max_batch_size=max_batch_size, max_wait=max_wait,
+                                    executor=self._executor)
+
+    @classmethod
+    def shared(cls, model: str, **kwargs) -> "LocalTranslationBackend":
+        """ Instance unique du processus pour ce modèle, créée au premier appel. """
+        if model not in cls._shared:
+            cls._shared[model] = cls(model=model, **kwargs)
+        return cls._shared[model]
+
+    # Les traductions locales ont leur propre espace dans le cache, distinct de celui du LLM
+    @property
+    def cache_model(self) -> str:
+        return f"{self.name}:{self.model}"
+
+    @property
+    def cache_keys(self) -> list:
+        return [(self.cache_model, self.prompt_version)]
+
+    # Chargement du modèle au premier usage
+    def load(self):
+        with self._lock:
+            if self._pipeline is None:
+                self._pipeline = transformers.pipeline("translation", model=self.model)
+        return self._pipeline
+
+    async def ready(self):
+        """ Charge le modèle dans le thread d'inférence, lève une exception s'il est indisponible. """
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.load)
+
+    def _infer(self, phrases: list) -> list:
+        results = self.load()(list(phrases), batch_size=len(phrases), max_length=self.max_length)
+        return [result["translation_text"] for result in results]
+
+    async def translate(self, phrase: str) -> str:
+        return await self.batcher.submit(phrase)
+
+    async def translate_versioned(self, phrase: str):
+        return await self.translate(phrase), self.prompt_version
+
+    def stats(self) -> dict:
+        return {"batches": self.batcher.batches, "phrases": self.batcher.items,
+                "mean_batch_size": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0}
+
+    async def close(self):
+        await self.batcher.close()
+        self._executor.shutdown(wait=False)
+
+
+class TranslationRouter:
+    """
+    Choix du moteur de traduction : les textes courts vont au modèle local, les autres au LLM.
+    Si le modèle local ne peut pas être chargé (transformers ou torch absents, modèle introuvable),
+    il est désactivé et toutes les traductions passent par le LLM ; une erreur de traduction locale
+    renvoie seulement ce texte au LLM.
+    remote : LLMTranslationBackend      --> Moteur par défaut
+    local : LocalTranslationBackend     --> Moteur local (None : désactivé)
+    max_chars : int                     --> Longueur maximale d'un texte traduit en local
+    """
+
+    def __init__(self, remote, local=None, max_chars: int = 200):
+        self.remote = remote
+        self.local = local
+        self.max_chars = max_chars
+        self.routed = {remote.name: 0}
+        self._local_ready = False
+        if local is not None:
+            self.routed[local.name] = 0
+
+    # Méthode pour choisir le moteur d'un texte
+    def backend(self, phrase: str):
+        if self.local is not None and len(phrase) <= self.max_chars:
+            return self.local
+        return self.remote
+
+    # Clés de cache où chercher la traduction d'un texte : celles du moteur choisi puis, pour le modèle local,
+    # celles du LLM qui traduit le texte quand le modèle local échoue
+    def cache_keys(self, phrase: str) -> list:
+        backend = self.backend(phrase)
+        if backend is self.remote:
+            return backend.cache_keys
+        return backend.cache_keys + self.remote.cache_keys
+
+    async def translate(self, phrase: str) -> str:
+        translation, _, _ = await self.translate_with_backend(phrase)
+        return translation
+
+    # Méthode pour traduire un texte, retourne (traduction, moteur qui l'a produite, version du prompt utilisé)
+    async def translate_with_backend(self, phrase: str):
+        backend = self.backend(phrase)
+        if backend is self.local and not self._local_ready:
+            try:
+                await backend.ready()
+                self._local_ready = True
+            except Exception as error:
+                print(f"Traduction : modèle local '{backend.model}' indisponible, "
+                      f"traductions envoyées au LLM ({error})", file=sys.stderr)
+                self.local = None
+                await backend.close()
+                backend = self.remote
+
+        if backend is self.local:
+            try:
+                translation, prompt_version = await backend.translate_versioned(phrase)
+                self.routed[backend.name] += 1
+                return translation, backend, prompt_version
+            except Exception as error:
+                print(f"Traduction locale impossible, envoyée au LLM ({error})", file=sys.stderr)
+
+        self.routed[self.remote.name] += 1
+        translation, prompt_version = await self.remote.translate_versioned(phrase)
+        return translation, self.remote, prompt_version
+
+    async def close(self):
+        for backend in (self.local, self.remote):
+            if backend is not None:
+                await backend.close()
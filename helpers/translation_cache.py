@@ -0,0 +1,120 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import hashlib
+import re
+import time
+import unicodedata
+
+from .cache import LRUCache
+from .lazy import LazyModule
+from .metrics import REGISTRY
+
+db = LazyModule("sqlalchemy")
+mysql = LazyModule("sqlalchemy.dialects.mysql")
+
+LOOKUPS = REGISTRY.counter("bot_translation_cache_total", "Lectures du cache des traductions",
+                           labelnames=("result",))
+
+
+def normalize_phrase(phrase: str) -> str:
+    """ Forme canonique d'une phrase : unicode NFC, casse ignorée, espaces réduits. """
+    phrase = unicodedata.normalize("NFC", phrase or "")
+    return re.sub(r"\s+", " ", phrase).strip().casefold()
+
+
+class TranslationCache:
+    """
+    Cache des traductions à deux niveaux : LRU en mémoire puis table SQLite persistante.
+    database : AsyncDataBase --> Base de données (config.AsyncDataBase) hébergeant la table
+    model : str             --> Modèle de traduction par défaut, fait partie de la clé
+    prompt_version : int    --> Version du prompt par défaut, fait partie de la clé
+    maxsize : int           --> Taille du niveau en mémoire
+    ttl : float             --> Durée de vie d'une traduction en secondes
+    """
+
+    TABLE = "Traduction"
+
+    def __init__(self, database, model: str, prompt_version: int, maxsize: int = 2048, ttl: float = 30 * 24 * 3600):
+        self.database = database
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self.database.sync.create_table(self.TABLE,
+                                   id_key=db.String,
+                                   phrase=db.String,
+                                   traduction=db.String,
+                                   model=db.String,
+                                   prompt_version=db.Integer,
+                                   created_at=db.Float)
+
+    # Méthode pour calculer la clé d'une phrase (model et prompt_version : ceux du cache par défaut)
+    def key(self, phrase: str, model: str = None, prompt_version: int = None) -> str:
+        model = self.model if model is None else model
+        prompt_version = self.prompt_version if prompt_version is None else prompt_version
+        raw = f"{model}|{prompt_version}|{normalize_phrase(phrase)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # Méthode pour lire une traduction, None si absente ou expirée
+    async def get(self, phrase: str, model: str = None, prompt_version: int = None):
+        return await self.get_any(phrase, [(model, prompt_version)])
+
+    # Méthode pour lire la première traduction trouvée parmi plusieurs clés (modèle, version du prompt)
+    async def get_any(self, phrase: str, keys: list):
+        keys = [self.key(phrase, model, prompt_version) for model, prompt_version in keys]
+
+        for key in keys:
+            traduction = self.memory.get(key)
+            if traduction is not None:
+                self.hits_memory += 1
+                LOOKUPS.inc(result="hit_memory")
+                return traduction
+
+        for key in keys:
+            row = await self.database.read_table_by_id(self.TABLE, 'id_key', key)
+            if row is not None and row.created_at + self.ttl > time.time():
+                self.hits_disk += 1
+                LOOKUPS.inc(result="hit_disk")
+                self.memory.set(key, row.traduction, ttl=row.created_at + self.ttl - time.time())
+                return row.traduction
+
+        self.misses += 1
+        LOOKUPS.inc(result="miss")
+        return None
+
+    # Méthode pour enregistrer une traduction dans les deux niveaux
+    async def set(self, phrase: str, traduction: str, model: str = None, prompt_version: int = None):
+        key = self.key(phrase, model, prompt_version)
+        self.memory.set(key, traduction)
+
+        values = dict(id_key=key, phrase=normalize_phrase(phrase), traduction=traduction,
+                      model=self.model if model is None else model,
+                      prompt_version=self.prompt_version if prompt_version is None else prompt_version,
+                      created_at=time.time())
+        await self.database.run(self._upsert, values)
+
+    # Insertion ou remplacement en une requête : les traductions simultanées d'une même phrase ne se gênent pas
+    def _upsert(self, values: dict):
+        engine = self.database.sync.engine
+        table = self.database.sync.read_table(self.TABLE)
+        if engine.dialect.name == "mysql":
+            stmt = mysql.insert(table).values(values)
+            stmt = stmt.on_duplicate_key_update(**{name: stmt.inserted[name] for name in values if name != "id_key"})
+        else:
+            # SQLite
+            stmt = table.insert().prefix_with("OR REPLACE").values(values)
+        with engine.begin() as connection:
+            connection.execute(stmt)
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {"hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_ratio": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "size_memory": len(self.memory)}
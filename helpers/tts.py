@@ -0,0 +1,59 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import io
+import math
+import time
+
+from .lazy import LazyModule
+from .sentences import split_sentences
+
+gtts = LazyModule("gtts")
+
+# Trame MP3 muette (MPEG-1 Layer III, 128 kbit/s, 44,1 kHz) : environ 26 ms de silence
+SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+def chunk_text(text: str, max_chars: int = 100) -> list:
+    """
+    Découpe un texte en morceaux synthétisables séparément : phrases entières,
+    les phrases courtes consécutives étant regroupées tant que le morceau reste sous max_chars.
+    """
+    chunks = []
+    for sentence in split_sentences(text):
+        if chunks and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks or [text]
+
+
+class GTTSBackend:
+    """ Synthèse vocale par gTTS (service Google Translate), au format MP3. """
+
+    name = "gtts"
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        buffer = io.BytesIO()
+        gtts.gTTS(text=text, lang=lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class LocalTTSBackend:
+    """
+    Synthèse locale sans réseau, pour les tests et les déploiements isolés : un MP3 muet dont la durée suit
+    la longueur du texte. La carte audio reste fonctionnelle sans service externe.
+    latency : float --> Durée simulée de synthèse par tranche de 100 caractères, en secondes
+                        (comme gTTS, qui envoie une requête par tranche)
+    """
+
+    name = "local"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def synthesize(self, text: str, lang: str) -> bytes:
+        if self.latency:
+            time.sleep(self.latency * math.ceil(len(text) / 100))
+        return SILENT_FRAME * max(1, len(text) // 15)
+
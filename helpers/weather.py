@@ -0,0 +1,143 @@
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+import asyncio
+import sys
+import time
+from urllib.parse import quote
+
+from .cache import LRUCache
+from .http_client import HttpClient
+from .lazy import LazyModule
+from .metrics import timed
+
+bs4 = LazyModule("bs4")
+
+
+def parse_msn_weather(html: str):
+    """
+    Extrait la météo du jour d'une page de prévisions MSN.
+    Retourne {"img", "temp", "prevision"} ou None si la page n'a pas le format attendu.
+    """
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    try:
+        summary = soup.find('div', class_='summaryLineGroupCompact-E1_1')
+        return {"img": summary.find('img').attrs['src'],
+                "temp": summary.find('a').attrs['title'].replace('\u200e', ' '),
+                "prevision": soup.find('div', class_='summaryDescContainer-E1_1').find('p').text}
+    except (AttributeError, KeyError):
+        return None
+
+
+class WeatherService:
+    """
+    Cache de la météo par ville, rafraîchi en tâche de fond.
+    La lecture ne bloque jamais : elle retourne la dernière météo connue ou None.
+    Seules les villes du profil des utilisateurs (table User) ou vues récemment sont rafraîchies.
+    database : AsyncDataBase     --> Base contenant la table User
+    refresh_interval : float     --> Période de rafraîchissement en secondes
+    recent_ttl : float           --> Durée pendant laquelle une ville vue reste rafraîchie
+    url : str                    --> Page de prévisions, {city} est remplacé par la ville
+    http : HttpClient            --> Client HTTP partagé (délais, disjoncteur de l'hôte)
+    """
+
+    URL = 'https://www.msn.com/fr-fr/meteo/previsions/in-{city}'
+
+    def __init__(self, database, refresh_interval: float = 900, recent_ttl: float = 24 * 3600,
+                 url: str = None, http: HttpClient = None):
+        self.database = database
+        self.url = url or self.URL
+        self.refresh_interval = refresh_interval
+        self.http = http or HttpClient()
+        # Météo des villes rafraîchies : les villes qui ne le sont plus expirent après recent_ttl
+        self.weather = LRUCache(maxsize=1024, ttl=recent_ttl)
+        self.recent = LRUCache(maxsize=1024, ttl=recent_ttl)
+        self._refreshing = set()
+        # Rafraîchissements lancés par get(), gardés jusqu'à leur fin
+        self._tasks = set()
+        self._task = None
+
+    @staticmethod
+    def _key(city: str) -> str:
+        return (city or '').strip().casefold()
+
+    # Méthode pour lire la météo d'une ville depuis le cache
+    def get(self, city: str):
+        """
+        Retourne {"img", "temp", "prevision", "updated_at"} ou None si la ville n'est pas encore connue.
+        Une ville inconnue est rafraîchie en tâche de fond pour les prochains appels.
+        """
+        key = self._key(city)
+        if not key:
+            return None
+
+        self.recent.set(key, city)
+        if key not in self.weather and key not in self._refreshing:
+            self._refreshing.add(key)
+            task = asyncio.ensure_future(self.refresh(city))
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+        return self.weather.get(key)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Weather : rafraîchissement impossible ({task.exception()})", file=sys.stderr)
+
+    # Villes à rafraîchir : profils enregistrés et sessions récentes
+    async def cities(self) -> dict:
+        cities = {}
+        try:
+            for row in await self.database.select_table('User'):
+                if row.city:
+                    cities[self._key(row.city)] = row.city
+        except Exception as error:
+            print(f"Weather : lecture de la table User impossible ({error})", file=sys.stderr)
+
+        cities.update(self.recent.items())
+        return cities
+
+    # Méthode pour rafraîchir la météo d'une ville, sans bloquer la boucle d'évènements
+    async def refresh(self, city: str):
+        key = self._key(city)
+        self._refreshing.add(key)
+        try:
+            with timed("msn"):
+                # La ville vient du texte de l'utilisateur : elle est encodée dans l'URL
+                html = await self.http.get_text(self.url.format(city=quote(city.strip(), safe="")))
+            weather = await asyncio.get_running_loop().run_in_executor(None, parse_msn_weather, html)
+            if weather is not None:
+                weather["updated_at"] = time.time()
+                self.weather.set(key, weather)
+        except Exception as error:
+            # On conserve la dernière valeur connue
+            print(f"Weather : rafraîchissement de '{city}' impossible ({error})", file=sys.stderr)
+        finally:
+            self._refreshing.discard(key)
+
+    async def refresh_all(self):
+        await asyncio.gather(*[self.refresh(city) for key, city in (await self.cities()).items()
+                               if key not in self._refreshing])
+
+    async def _run(self):
+        while True:
+            await self.refresh_all()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
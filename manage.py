@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License.
+
+"""
+Commandes d'administration du bot, à lancer depuis le dossier de travail du bot (bot arrêté) :
+
+    python manage.py migrate-pictures             --> convertit les images de profil picklées de database.db
+    python manage.py export-users users.jsonl     --> exporte la table User (une ligne JSON par profil)
+    python manage.py import-users users.jsonl     --> crée ou remplace les profils du fichier, par lots
+
+Les images enregistrées (picture_hash) restent dans PICTURES_DIR, à copier avec l'export.
+"""
+
+import argparse
+import json
+
+from config import DataBase, AsyncDataBase, DefaultConfig
+from helpers.blob_store import BlobStore
+from helpers.profile_store import ProfileStore
+
+
+# Méthode pour ouvrir la table des profils
+def open_profiles(args) -> ProfileStore:
+    database = AsyncDataBase(DataBase(args.database))
+    return ProfileStore(database, BlobStore(DefaultConfig.PICTURES_DIR, base_url=DefaultConfig.PUBLIC_URL))
+
+
+def migrate_pictures(args):
+    profiles = open_profiles(args)
+    try:
+        print(f"{profiles.migrate_pictures()} profil(s) migré(s)")
+    finally:
+        profiles.close()
+        profiles.database.close()
+
+
+# Méthode pour exporter la table User
+def export_users(args):
+    profiles = open_profiles(args)
+    try:
+        rows = profiles.export_rows()
+        with open(args.file, "w", encoding="utf-8") as output:
+            for row in rows:
+                output.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"{len(rows)} profil(s) exporté(s)")
+    finally:
+        profiles.close()
+        profiles.database.close()
+
+
+# Méthode pour importer des profils, en transactions de --batch-size lignes
+def import_users(args):
+    profiles = open_profiles(args)
+    try:
+        with open(args.file, encoding="utf-8") as source:
+            rows = (json.loads(line) for line in source if line.strip())
+            count = profiles.import_rows(rows, batch_size=args.batch_size)
+        print(f"{count} profil(s) importé(s)")
+    finally:
+        profiles.close()
+        profiles.database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="database", help="Nom de la base SQLite (sans .db)")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    commands.add_parser("migrate-pictures", help="Images picklées -> métadonnées et fichiers").set_defaults(
+        func=migrate_pictures)
+    export = commands.add_parser("export-users", help="Table User -> fichier JSON lines")
+    export.add_argument("file", help="Fichier à écrire")
+    export.set_defaults(func=export_users)
+    load = commands.add_parser("import-users", help="Fichier JSON lines -> table User")
+    load.add_argument("file", help="Fichier à lire")
+    load.add_argument("--batch-size", type=int, default=500, help="Profils écrits par transaction")
+    load.set_defaults(func=import_users)
+
+    args = parser.parse_args()
+    args.func(args)
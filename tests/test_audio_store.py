@@ -0,0 +1,21 @@
+import asyncio
+import os
+
+from helpers.audio_store import AudioStore
+from helpers.tts import LocalTTSBackend
+
+
+def test_synthesize_again_when_file_was_evicted(tmp_path):
+    async def scenario():
+        store = AudioStore(directory=str(tmp_path), base_url="", backend=LocalTTSBackend())
+        try:
+            url = await store.synthesize("Bonjour tout le monde.", "fr")
+            path = store.path(store.name("Bonjour tout le monde.", "fr"))
+            os.remove(path)
+
+            assert await store.synthesize("Bonjour tout le monde.", "fr") == url
+            assert os.path.exists(path)
+        finally:
+            store.close()
+
+    asyncio.run(scenario())
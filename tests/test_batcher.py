@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from helpers.batcher import MicroBatcher
+
+
+def test_close_fails_queued_items_and_finishes_running_batches():
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def process(items):
+            started.set()
+            await release.wait()
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(process, max_batch_size=1, max_wait=0)
+        running = asyncio.ensure_future(batcher.submit(1))
+        await started.wait()
+        queued = [asyncio.ensure_future(batcher.submit(item)) for item in (2, 3)]
+        await asyncio.sleep(0)
+
+        closing = asyncio.ensure_future(batcher.close())
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.wait_for(closing, 1)
+
+        assert await running == 2
+        for future in queued:
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(future, 1)
+
+    asyncio.run(scenario())
+
+
+def test_batches_concurrent_items():
+    async def scenario():
+        sizes = []
+
+        async def process(items):
+            sizes.append(len(items))
+            return [item + 1 for item in items]
+
+        batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.01)
+        assert await asyncio.gather(*[batcher.submit(item) for item in range(5)]) == [1, 2, 3, 4, 5]
+        assert sizes == [5]
+        await batcher.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,107 @@
+import asyncio
+import base64
+import pickle
+
+from botbuilder.schema import Attachment
+
+from config import AsyncDataBase, DataBase
+from helpers.blob_store import BlobStore
+from helpers.lazy import LazyModule
+from helpers.profile_store import ProfileStore
+
+db = LazyModule("sqlalchemy")
+
+
+def open_store(tmp_path) -> ProfileStore:
+    database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+    return ProfileStore(database, BlobStore(str(tmp_path / "pictures")), flush_delay=0.01)
+
+
+def close_store(store: ProfileStore):
+    store.close()
+    store.database.close()
+
+
+def test_read_your_writes_before_flush(tmp_path):
+    async def scenario():
+        store = open_store(tmp_path)
+        try:
+            saved = await store.save("u1", "Alice", 30, "Paris", "Vélo")
+            assert await store.get("u1") == saved
+
+            await store.save("u1", "Alice", 31, "Lyon", "Train")
+            assert (await store.get("u1")).city == "Lyon"
+
+            await store.delete("u1")
+            assert await store.get("u1") is None
+
+            await store.save("u2", "Bob", 40, "Nice", "Bus")
+            await store.flush()
+            store.cache.clear()
+            assert (await store.get("u2")).name == "Bob"
+            assert await store.get("u1") is None
+        finally:
+            close_store(store)
+
+    asyncio.run(scenario())
+
+
+def test_other_worker_sees_write_after_flush(tmp_path):
+    async def scenario():
+        worker_a, worker_b = open_store(tmp_path), open_store(tmp_path)
+        try:
+            await worker_a.save("u1", "Alice", 30, "Paris", "Vélo")
+            await worker_a.flush()
+            assert (await worker_b.get("u1")).city == "Paris"
+
+            await worker_a.save("u1", "Alice", 30, "Lyon", "Vélo")
+            await worker_a.flush()
+            assert (await worker_b.get("u1")).city == "Lyon"
+        finally:
+            close_store(worker_a)
+            close_store(worker_b)
+
+    asyncio.run(scenario())
+
+
+def write_baseline_rows(tmp_path, rows):
+    # Table et lignes écrites comme par les versions précédentes (Attachment picklé dans une colonne PickleType)
+    database = DataBase(str(tmp_path / "database"))
+    database.create_table("User", id_user=db.String, name=db.String, age=db.Integer, city=db.String,
+                          transport=db.String, picture=db.PickleType)
+    for id_user, picture in rows:
+        database.add_row("User", id_user=id_user, name=id_user, age=20, city="Paris", transport="Bus", picture=picture)
+    database.engine.dispose()
+
+
+def test_migrate_pictures_from_baseline_rows(tmp_path):
+    hosted = Attachment(content_type="image/png", content_url="https://example.com/alice.png")
+    inline = Attachment(content_type="image/png",
+                        content_url="data:image/png;base64," + base64.b64encode(b"\x89PNG").decode())
+    write_baseline_rows(tmp_path, [(id_user, pickle.dumps(picture))
+                                   for id_user, picture in (("u1", hosted), ("u2", inline), ("u3", None))])
+
+    database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+    store = ProfileStore(database, BlobStore(str(tmp_path / "pictures")))
+    try:
+        assert store.migrate_pictures() == 3
+        rows = {row.id_user: row for row in store.database.sync.select_table("User")}
+        assert (rows["u1"].picture_type, rows["u1"].picture_url) == ("image/png", "https://example.com/alice.png")
+        assert rows["u2"].picture_hash is not None
+        with open(store.blobs.path(store.blobs.name(rows["u2"].picture_hash, "image/png")), "rb") as file:
+            assert file.read() == b"\x89PNG"
+        assert (rows["u3"].picture_url, rows["u3"].picture_hash) == (None, None)
+    finally:
+        close_store(store)
+
+
+def test_migrate_pictures_keeps_column_on_failure(tmp_path):
+    write_baseline_rows(tmp_path, [("u1", b"not a pickle")])
+    database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+    store = ProfileStore(database, BlobStore(str(tmp_path / "pictures")))
+    try:
+        assert store.migrate_pictures() == 0
+        columns = [column["name"] for column in db.inspect(database.sync.engine).get_columns("User")]
+        assert "picture" in columns
+    finally:
+        close_store(store)
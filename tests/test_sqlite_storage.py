@@ -0,0 +1,127 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from helpers.sqlite_storage import SqliteStorage
+
+
+def test_conflict_does_not_lose_other_keys(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        try:
+            await storage.write({"convA": {"value": 1, "e_tag": "*"}, "convB": {"value": 1, "e_tag": "*"}})
+            await storage.flush()
+            stale = (await storage.read(["convB"]))["convB"]
+            stale["value"] = 3
+
+            # convB est modifiée par un autre tour avant que le premier ne valide la sienne
+            current = (await storage.read(["convB"]))["convB"]
+            current["value"] = 2
+            await storage.write({"convB": current})
+            await storage.flush(["convB"])
+
+            conv_a = (await storage.read(["convA"]))["convA"]
+            conv_a["value"] = 10
+            await storage.write({"convA": conv_a})
+            await storage.write({"convB": stale})
+
+            results = await asyncio.gather(storage.flush(["convA"]), storage.flush(["convB"]),
+                                           return_exceptions=True)
+            assert results[0] is None
+            assert isinstance(results[1], KeyError)
+
+            stored = await storage.read(["convA", "convB"])
+            assert stored["convA"]["value"] == 10
+            assert stored["convB"]["value"] == 2
+        finally:
+            storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_flush_raises_conflict_for_all_keys(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        try:
+            await storage.write({"conv": {"value": 1, "e_tag": "*"}})
+            await storage.flush()
+            await storage.write({"conv": {"value": 2, "e_tag": "outdated"}})
+            with pytest.raises(KeyError):
+                await storage.flush()
+            assert (await storage.read(["conv"]))["conv"]["value"] == 1
+        finally:
+            storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_stale_write_on_pending_key_is_rejected(tmp_path):
+    async def scenario():
+        storage = SqliteStorage(str(tmp_path / "state.db"))
+        try:
+            await storage.write({"conv": {"value": 0, "e_tag": "*"}})
+            await storage.flush()
+
+            # Deux tours lisent le même état, le premier écrit (en attente), puis le second avec l'e_tag lu
+            first = (await storage.read(["conv"]))["conv"]
+            second = (await storage.read(["conv"]))["conv"]
+            first["value"] = 1
+            await storage.write({"conv": first})
+            second["value"] = 2
+            with pytest.raises(KeyError):
+                await storage.write({"conv": second})
+
+            await storage.flush(["conv"])
+            assert (await storage.read(["conv"]))["conv"]["value"] == 1
+
+            # L'écriture suivante, faite depuis l'état en attente, est acceptée
+            current = (await storage.read(["conv"]))["conv"]
+            current["value"] = 3
+            await storage.write({"conv": current})
+            chained = (await storage.read(["conv"]))["conv"]
+            chained["value"] = 4
+            await storage.write({"conv": chained})
+            await storage.flush(["conv"])
+            assert (await storage.read(["conv"]))["conv"]["value"] == 4
+        finally:
+            storage.close()
+
+    asyncio.run(scenario())
+
+
+def write_from_other_process(path: str, value: int):
+    async def scenario():
+        storage = SqliteStorage(path)
+        try:
+            current = (await storage.read(["conv"]))["conv"]
+            current["value"] = value
+            await storage.write({"conv": current})
+            await storage.flush()
+        finally:
+            storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_cache_sees_writes_from_another_process(tmp_path):
+    path = str(tmp_path / "state.db")
+
+    async def scenario():
+        storage = SqliteStorage(path)
+        try:
+            await storage.write({"conv": {"value": 1, "e_tag": "*"}})
+            await storage.flush()
+            # La valeur est maintenant dans le cache de lecture de ce processus
+            assert (await storage.read(["conv"]))["conv"]["value"] == 1
+
+            worker = multiprocessing.get_context("spawn").Process(target=write_from_other_process, args=(path, 2))
+            worker.start()
+            await asyncio.get_running_loop().run_in_executor(None, worker.join, 30)
+            assert worker.exitcode == 0
+
+            assert (await storage.read(["conv"]))["conv"]["value"] == 2
+        finally:
+            storage.close()
+
+    asyncio.run(scenario())
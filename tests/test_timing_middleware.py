@@ -0,0 +1,26 @@
+import asyncio
+
+from botbuilder.schema import Activity, ActivityTypes
+
+from helpers.metrics import TURNS
+from helpers.timing_middleware import TimingMiddleware
+
+
+class Context:
+    def __init__(self, activity_type):
+        self.activity = Activity(type=activity_type)
+
+
+def test_enum_and_string_types_share_a_label():
+    async def logic():
+        pass
+
+    async def scenario():
+        middleware = TimingMiddleware()
+        await middleware.on_turn(Context(ActivityTypes.event), logic)
+        await middleware.on_turn(Context("event"), logic)
+
+    asyncio.run(scenario())
+    rendered = "\n".join(TURNS.render())
+    assert 'type="event"' in rendered
+    assert "ActivityTypes" not in rendered
@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+from helpers.translation import BatchedLLMTranslationBackend, LLMTranslationBackend, TranslationRouter
+
+
+class EchoBackend:
+    def __init__(self, name: str, fail: bool = False):
+        self.name = name
+        self.model = name
+        self.cache_model = name
+        self.prompt_version = 1
+        self.cache_keys = [(name, 1)]
+        self.fail = fail
+
+    async def ready(self):
+        pass
+
+    async def translate(self, phrase: str) -> str:
+        if self.fail:
+            raise RuntimeError("unavailable")
+        return f"{self.name}:{phrase}"
+
+    async def translate_versioned(self, phrase: str):
+        return await self.translate(phrase), self.prompt_version
+
+    async def close(self):
+        pass
+
+
+class FakeLLM:
+    """ Répond par un tableau JSON aux demandes groupées (ou par du texte si malformed), sinon par une phrase. """
+
+    def __init__(self, malformed: bool = False):
+        self.malformed = malformed
+
+    async def chat(self, model: str, messages: list, **kwargs) -> str:
+        content = messages[-1]["content"]
+        if content.startswith("["):
+            return "not json" if self.malformed else json.dumps([f"batch:{phrase}" for phrase in json.loads(content)])
+        return f"single:{content}"
+
+
+def test_router_reports_producing_backend():
+    async def scenario():
+        remote, local = EchoBackend("llm"), EchoBackend("local")
+        router = TranslationRouter(remote, local=local, max_chars=10)
+        assert await router.translate_with_backend("Bonjour") == ("local:Bonjour", local, 1)
+        assert await router.translate_with_backend("Bonjour tout le monde") == (
+            "llm:Bonjour tout le monde", remote, 1)
+
+    asyncio.run(scenario())
+
+
+def test_router_reports_llm_on_local_failure():
+    async def scenario():
+        remote, local = EchoBackend("llm"), EchoBackend("local", fail=True)
+        router = TranslationRouter(remote, local=local, max_chars=10)
+        assert await router.translate_with_backend("Bonjour") == ("llm:Bonjour", remote, 1)
+
+    asyncio.run(scenario())
+
+
+def test_batched_prompt_has_its_own_cache_version():
+    single = LLMTranslationBackend(llm=None)
+    batched = BatchedLLMTranslationBackend(llm=None)
+    assert single.cache_model == batched.cache_model
+    assert single.prompt_version != batched.prompt_version
+
+
+def test_batched_results_report_prompt_used():
+    async def scenario():
+        backend = BatchedLLMTranslationBackend(FakeLLM(), max_wait=0.01)
+        try:
+            # Une phrase seule dans son lot passe par le prompt par phrase
+            translation, version = await backend.translate_versioned("Bonjour")
+            assert version == LLMTranslationBackend.prompt_version
+            assert translation.startswith("single:")
+
+            results = await asyncio.gather(backend.translate_versioned("Bonjour"),
+                                           backend.translate_versioned("Merci"))
+            assert results == [("batch:Bonjour", 2), ("batch:Merci", 2)]
+        finally:
+            await backend.close()
+
+        fallback = BatchedLLMTranslationBackend(FakeLLM(malformed=True), max_wait=0.01)
+        try:
+            results = await asyncio.gather(fallback.translate_versioned("Bonjour"),
+                                           fallback.translate_versioned("Merci"))
+            assert [version for _, version in results] == [1, 1]
+        finally:
+            await fallback.close()
+
+    asyncio.run(scenario())
+
+
+def test_router_cache_keys_include_llm_fallback():
+    remote, local = EchoBackend("llm"), EchoBackend("local")
+    router = TranslationRouter(remote, local=local, max_chars=10)
+    assert router.cache_keys("Bonjour") == [("local", 1), ("llm", 1)]
+    assert router.cache_keys("Bonjour tout le monde") == [("llm", 1)]
@@ -0,0 +1,77 @@
+import asyncio
+
+from config import AsyncDataBase, DataBase
+from helpers.metrics import REGISTRY
+from helpers.translation_cache import LOOKUPS, TranslationCache
+
+
+def test_concurrent_set_same_phrase(tmp_path):
+    async def scenario():
+        database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+        cache = TranslationCache(database, model="gpt-3.5-turbo", prompt_version=1)
+        try:
+            await asyncio.gather(*[cache.set("Bonjour", "Hello") for _ in range(8)])
+            await cache.set("Bonjour", "Hi")
+
+            cache.memory.clear()
+            assert await cache.get("Bonjour") == "Hi"
+            assert len(await database.select_table(TranslationCache.TABLE)) == 1
+        finally:
+            database.close()
+
+    asyncio.run(scenario())
+
+
+def test_backends_have_separate_entries(tmp_path):
+    async def scenario():
+        database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+        cache = TranslationCache(database, model="gpt-3.5-turbo", prompt_version=1)
+        try:
+            await cache.set("Bonjour", "Hello")
+            assert await cache.get("Bonjour", "local:Helsinki-NLP/opus-mt-fr-en", 1) is None
+
+            await cache.set("Bonjour", "Hi", "local:Helsinki-NLP/opus-mt-fr-en", 1)
+            cache.memory.clear()
+            assert await cache.get("Bonjour") == "Hello"
+            assert await cache.get("Bonjour", "local:Helsinki-NLP/opus-mt-fr-en", 1) == "Hi"
+        finally:
+            database.close()
+
+    asyncio.run(scenario())
+
+
+def test_get_any_finds_entry_under_any_prompt_version(tmp_path):
+    async def scenario():
+        database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+        cache = TranslationCache(database, model="gpt-3.5-turbo", prompt_version=1)
+        try:
+            await cache.set("Bonjour", "Hello", "gpt-3.5-turbo", 1)
+            cache.memory.clear()
+            assert await cache.get_any("Bonjour", [("gpt-3.5-turbo", 2), ("gpt-3.5-turbo", 1)]) == "Hello"
+            assert await cache.get("Bonjour", "gpt-3.5-turbo", 2) is None
+        finally:
+            database.close()
+
+    asyncio.run(scenario())
+
+
+def test_lookups_are_exported_as_metrics(tmp_path):
+    async def scenario():
+        database = AsyncDataBase(DataBase(str(tmp_path / "database")))
+        cache = TranslationCache(database, model="gpt-3.5-turbo", prompt_version=1)
+        try:
+            before = {result: LOOKUPS.value(result=result) for result in ("hit_memory", "hit_disk", "miss")}
+            assert await cache.get("Merci") is None
+            await cache.set("Merci", "Thanks")
+            assert await cache.get("Merci") == "Thanks"
+            cache.memory.clear()
+            assert await cache.get("Merci") == "Thanks"
+
+            assert LOOKUPS.value(result="miss") == before["miss"] + 1
+            assert LOOKUPS.value(result="hit_memory") == before["hit_memory"] + 1
+            assert LOOKUPS.value(result="hit_disk") == before["hit_disk"] + 1
+            assert 'bot_translation_cache_total{result="miss"}' in REGISTRY.render()
+        finally:
+            database.close()
+
+    asyncio.run(scenario())
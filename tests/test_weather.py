@@ -0,0 +1,49 @@
+import asyncio
+
+from helpers.weather import WeatherService
+
+
+class FailingHttp:
+    async def get_text(self, url: str, params: dict = None) -> str:
+        raise RuntimeError("unreachable")
+
+
+def test_get_keeps_and_releases_refresh_task():
+    async def scenario():
+        weather = WeatherService(database=None, http=FailingHttp())
+        assert weather.get("Paris") is None
+        assert len(weather._tasks) == 1
+
+        await asyncio.gather(*list(weather._tasks))
+        await asyncio.sleep(0)
+        assert not weather._tasks
+        assert weather.get("Paris") is None
+        await weather.stop()
+        assert not weather._tasks
+
+    asyncio.run(scenario())
+
+
+class RecordingHttp:
+    def __init__(self):
+        self.urls = []
+
+    async def get_text(self, url: str, params: dict = None) -> str:
+        self.urls.append(url)
+        return "<html></html>"
+
+
+def test_city_is_encoded_in_url():
+    async def scenario():
+        http = RecordingHttp()
+        weather = WeatherService(database=None, http=http, url="https://example.com/in-{city}")
+        await weather.refresh("Saint-Étienne/../?x=1 ")
+        assert http.urls == ["https://example.com/in-Saint-%C3%89tienne%2F..%2F%3Fx%3D1"]
+
+    asyncio.run(scenario())
+
+
+def test_weather_entries_are_bounded():
+    weather = WeatherService(database=None, http=RecordingHttp(), recent_ttl=60)
+    assert weather.weather.maxsize == 1024
+    assert weather.weather.ttl == 60